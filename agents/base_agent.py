@@ -1,12 +1,29 @@
 from datetime import datetime
+from core.tracing import record_log
 
 class BaseAgent:
+    # Context keys the agent needs, may use if present, and produces. The
+    # coordinator schedules agents from these; leaving reads/writes as None
+    # makes the agent a sequential barrier.
+    reads = None
+    optional_reads = ()
+    writes = None
+    # Keys among `writes` holding paths of files the agent produces.
+    artifacts = ()
+    # Bump when a change alters the agent's outputs, to invalidate checkpoints.
+    version = 1
+
     def __init__(self, name: str):
         self.name = name
 
     def log(self, msg: str):
         ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{self.name}] {ts} - {msg}")
+        record_log(self.name, msg)
 
     def run(self, context: dict) -> dict:
         raise NotImplementedError
+
+    def checkpointable(self, context: dict) -> bool:
+        """Whether this run's outputs are worth reusing (False for degraded results)."""
+        return True
@@ -1,53 +1,162 @@
 import numpy as np
 import pandas as pd
 from .base_agent import BaseAgent
+from core.encoding import encode_categoricals
+from core.profile import profile_frame
+
+
+def _source_modes(modes, uniques, tops):
+    """Swap sample mode codes for the whole file's most frequent values, where known."""
+    modes = modes.copy()
+    for i, top in enumerate(tops):
+        if top is None or pd.isna(top):
+            continue
+        match = np.flatnonzero(uniques == top)
+        if len(match):
+            modes[i] = match[0]
+        else:
+            uniques = np.append(uniques, top)
+            modes[i] = len(uniques) - 1
+    return modes, uniques
+
+
+def _source_tops(source, frame, columns):
+    """Whole-file most frequent values of `columns` that the sample's dtypes can hold."""
+    tops = {}
+    for col, top in source.table.loc[columns, "top"].items():
+        if top is None or pd.isna(top):
+            continue
+        dtype = frame[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype) and top not in dtype.categories:
+            continue
+        tops[col] = top
+    return tops
+
 
 class DataAgent(BaseAgent):
     """Cleans and preprocesses the uploaded dataset generically."""
 
+    reads = ("data",)
+    optional_reads = ("source_profile",)
+    writes = ("raw_data", "clean_data", "encoding_plan", "data_profile")
+
     def __init__(self):
         super().__init__("DataAgent")
 
     def run(self, context):
-        raw_df = context["data"].copy()
-        df = raw_df.copy()
+        raw_df = context["data"]
         self.log("Cleaning & preprocessing dataset...")
 
-        # Strip whitespace from column names
-        df.columns = [str(c).strip() for c in df.columns]
+        # Strip whitespace from column names (set_axis doesn't deep-copy the data)
+        df = raw_df.set_axis([str(c).strip() for c in raw_df.columns], axis=1)
+        n = len(df)
+
+        # One profiling pass: missingness (empty strings count as NaN),
+        # numeric means and the factorized text columns
+        profile = profile_frame(df)
+        text_mask = (profile.table["kind"] == "text").to_numpy()
+        missing = profile.table["missing"].to_numpy()
+        text = profile.text_block()
 
-        # Treat empty strings as NaN
-        df.replace({"": np.nan, " ": np.nan}, inplace=True)
+        # When `data` is a sample, impute from the whole file's statistics
+        source = context.get("source_profile")
+        if source is not None and source.n_cols == df.shape[1]:
+            source = source.renamed(df.columns)
+            self.log(f"Imputing from statistics of all {source.n_rows:,} rows")
+        else:
+            source = None
+        dataset = profile if source is None else source
 
         # Drop columns that are almost entirely missing
-        thresh = int(0.9 * len(df))
-        df.dropna(axis=1, thresh=len(df) - thresh, inplace=True)
-
-        # Try to coerce object columns to numeric when reasonable
-        for col in df.columns:
-            if df[col].dtype == "object":
-                num = pd.to_numeric(df[col], errors="coerce")
-                if num.notna().sum() >= 0.7 * len(df):
-                    df[col] = num
-
-        # Impute missing values
-        for col in df.columns:
-            if pd.api.types.is_numeric_dtype(df[col]):
-                mean_val = df[col].mean()
-                df[col] = df[col].fillna(mean_val)
-            else:
-                if df[col].isna().any():
-                    try:
-                        mode = df[col].mode().iloc[0]
-                    except IndexError:
-                        mode = "Unknown"
-                    df[col] = df[col].fillna(mode)
-
-        # One-hot encode categoricals
-        cat_cols = df.select_dtypes(include=["object", "category"]).columns
-        df = pd.get_dummies(df, columns=cat_cols, drop_first=True)
+        thresh = int(0.9 * n)
+        keep = (n - missing) >= n - thresh
+        order = df.columns[keep]
+        other = df.iloc[:, keep & ~text_mask]
+        other_missing = pd.Series(missing[keep & ~text_mask], index=other.columns)
+
+        parts = []
+        if text is not None:
+            text.select(keep[text_mask])
+
+            # Coerce text columns to numeric when reasonable, all at once
+            candidates = np.flatnonzero(text.numeric_candidates())
+            values = text.as_numbers(text.codes[:, candidates])
+            parsed = (~np.isnan(values)).sum(axis=0)
+            to_numeric = parsed >= 0.7 * n
+            num_idx = candidates[to_numeric]
+            values = values[:, to_numeric]
+            parsed = parsed[to_numeric]
+
+            if len(num_idx):
+                # Impute the coerced columns with their means in the same block
+                means = np.nanmean(values, axis=0) if n else np.zeros(len(num_idx))
+                values = np.where(np.isnan(values), means, values)
+                coerced = pd.DataFrame(values, index=df.index, columns=text.columns[num_idx])
+                whole = (parsed == n) & (values == np.round(values)).all(axis=0)
+                if whole.any():
+                    coerced = coerced.astype({c: "int64" for c in coerced.columns[whole]})
+                parts.append(coerced)
+
+            # Remaining text columns: fill gaps with each column's mode
+            txt_idx = np.setdiff1d(np.arange(len(text.columns)), num_idx)
+            if len(txt_idx):
+                codes = text.codes[:, txt_idx]
+                gaps = (codes < 0).any(axis=0)
+                uniques = text.uniques
+                if gaps.any():
+                    modes = text.modes(txt_idx[gaps])
+                    if source is not None:
+                        tops = source.table["top"].reindex(text.columns[txt_idx[gaps]])
+                        modes, uniques = _source_modes(modes, uniques, tops)
+                    if (modes < 0).any():
+                        uniques = np.append(uniques, "Unknown")
+                        modes = np.where(modes < 0, len(uniques) - 1, modes)
+                    fill = np.full(len(txt_idx), -1, dtype=np.int64)
+                    fill[gaps] = modes
+                    codes = np.where(codes < 0, fill, codes)
+                parts.append(
+                    pd.DataFrame(uniques[codes], index=df.index, columns=text.columns[txt_idx], dtype=object)
+                )
+
+        # Impute the non-text columns: means for numeric, modes otherwise
+        incomplete = other_missing.index[other_missing > 0]
+        if len(incomplete):
+            numeric = np.array([pd.api.types.is_numeric_dtype(other[c]) for c in incomplete], dtype=bool)
+            fill = {}
+            if numeric.any():
+                stats = dataset.table.loc[incomplete[numeric], ["kind", "mean"]]
+                fill.update(stats["mean"][stats["kind"] == "numeric"].to_dict())
+                unprofiled = stats.index[stats["kind"] != "numeric"]
+                if len(unprofiled):
+                    fill.update(other[unprofiled].mean().to_dict())
+            if (~numeric).any():
+                modes = other[incomplete[~numeric]].mode(dropna=True)
+                if len(modes):
+                    fill.update(modes.iloc[0].to_dict())
+                if source is not None:
+                    fill.update(_source_tops(source, other, incomplete[~numeric]))
+            fill = {c: v for c, v in fill.items() if not pd.isna(v)}
+            if fill:
+                other = other.fillna(value=fill)
+        parts.insert(0, other)
+
+        df = pd.concat(parts, axis=1) if len(parts) > 1 else parts[0]
+        if not df.columns.equals(order):
+            df = df[order]
+
+        # Encode categoricals by cardinality: sparse one-hot, frequency or drop
+        df, plan = encode_categoricals(df)
+        if plan["dropped"] or plan["frequency"]:
+            self.log(
+                f"High-cardinality columns — frequency encoded: {plan['frequency']}, "
+                f"dropped as identifiers: {plan['dropped']}"
+            )
 
         context["raw_data"] = raw_df
         context["clean_data"] = df
+        context["encoding_plan"] = plan
+        # The factorized text codes were only needed for cleaning
+        profile.text = None
+        context["data_profile"] = dataset
         self.log("Data preprocessing complete")
         return context
@@ -1,69 +1,76 @@
-import os
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import confusion_matrix, roc_curve, roc_auc_score
 from .base_agent import BaseAgent
+from core.charts import ChartRenderer, ChartSpec
+from core.metrics import classification_metrics, confusion_frame, prompt_summaries
 
 class EvaluationAgent(BaseAgent):
-    """Creates target distribution, confusion matrix and ROC curve (if binary)."""
+    """Computes test-set metrics and creates target distribution, confusion matrix and ROC charts."""
 
-    def __init__(self):
+    reads = ("model_scores", "best_model", "X_test", "y_test")
+    optional_reads = ("output_dir",)
+    writes = (
+        "target_plot", "conf_matrix", "roc_curve", "charts",
+        "evaluation_metrics", "conf_matrix_info", "target_info", "auc_score",
+    )
+    artifacts = ("target_plot", "conf_matrix", "roc_curve")
+
+    def __init__(self, renderer=None):
         super().__init__("EvaluationAgent")
+        self.renderer = renderer or ChartRenderer()
 
     def run(self, context):
-        if context.get("model_scores") is None:
-            self.log("⚠ Skipping evaluation — no trained models (single-class target).")
+        if not context.get("model_scores") or context.get("best_model") is None:
+            self.log("⚠ Skipping evaluation — no trained models.")
             return context
 
-        os.makedirs("outputs", exist_ok=True)
-
         best_model = context["best_model"]
         X_test = context["X_test"]
         y_test = context["y_test"]
 
+        # One probability pass over X_test; every metric is derived from it.
+        metrics = classification_metrics(best_model, X_test, y_test)
+        conf_matrix_info, target_info = prompt_summaries(metrics)
+        context["evaluation_metrics"] = metrics
+        context["conf_matrix_info"] = conf_matrix_info
+        context["target_info"] = target_info
+        context["auc_score"] = round(metrics["auc"], 4) if metrics["auc"] is not None else None
+        self.log(
+            f"Test accuracy {metrics['accuracy']:.3f}, macro F1 {metrics['macro_f1']:.3f}"
+            + (f", AUC {metrics['auc']:.3f}" if metrics["auc"] is not None else "")
+        )
+
+        specs = []
+
         # 1. Target distribution
-        plt.figure(figsize=(4, 3), dpi=200)
-        sns.countplot(x=y_test)
-        plt.title("Target Distribution")
-        plt.tight_layout()
-        target_path = "outputs/target_distribution.png"
-        plt.savefig(target_path)
-        plt.close()
+        specs.append(ChartSpec("target_distribution", "count", {"values": y_test}, title="Target Distribution"))
 
         # 2. Confusion matrix
-        preds = best_model.predict(X_test)
-        cm = confusion_matrix(y_test, preds)
-
-        plt.figure(figsize=(4, 3), dpi=200)
-        sns.heatmap(cm, annot=True, fmt="d", cmap="Blues")
-        plt.title("Confusion Matrix")
-        plt.ylabel("True Label")
-        plt.xlabel("Predicted Label")
-        plt.tight_layout()
-        cm_path = "outputs/confusion_matrix.png"
-        plt.savefig(cm_path)
-        plt.close()
+        specs.append(ChartSpec(
+            "confusion_matrix",
+            "heatmap",
+            {
+                "matrix": confusion_frame(metrics),
+                "annot": True,
+                "fmt": "d",
+                "xlabel": "Predicted Label",
+                "ylabel": "True Label",
+            },
+            title="Confusion Matrix",
+        ))
 
-        # 3. ROC curve (only if binary and model has predict_proba)
-        roc_path = None
-        if hasattr(best_model, "predict_proba") and y_test.nunique() == 2:
-            probs = best_model.predict_proba(X_test)[:, 1]
-            fpr, tpr, _ = roc_curve(y_test, probs)
-            auc = roc_auc_score(y_test, probs)
+        # 3. ROC curve: binary, or one-vs-rest per class for multiclass
+        if metrics["roc_curves"]:
+            specs.append(ChartSpec(
+                "roc_curve",
+                "roc",
+                {"curves": metrics["roc_curves"], "xlabel": "False Positive Rate", "ylabel": "True Positive Rate"},
+                title="ROC Curve" if len(metrics["roc_curves"]) == 1 else "ROC Curves (one-vs-rest)",
+            ))
 
-            plt.figure(figsize=(4, 3), dpi=200)
-            plt.plot(fpr, tpr, label=f"AUC = {auc:.2f}")
-            plt.plot([0, 1], [0, 1], linestyle="--", color="grey")
-            plt.title("ROC Curve")
-            plt.xlabel("False Positive Rate")
-            plt.ylabel("True Positive Rate")
-            plt.legend()
-            plt.tight_layout()
-            roc_path = "outputs/roc_curve.png"
-            plt.savefig(roc_path)
-            plt.close()
+        # The charts are independent: render them side by side.
+        charts = self.renderer.render_many(specs, context.get("output_dir"))
+        context.setdefault("charts", {}).update(charts)
 
-        context["target_plot"] = target_path
-        context["conf_matrix"] = cm_path
-        context["roc_curve"] = roc_path
+        context["target_plot"] = charts["target_distribution"].path
+        context["conf_matrix"] = charts["confusion_matrix"].path
+        context["roc_curve"] = charts["roc_curve"].path if "roc_curve" in charts else None
         return context
@@ -1,28 +1,39 @@
-import os
-import matplotlib.pyplot as plt
-import seaborn as sns
 from .base_agent import BaseAgent
+from core.charts import ChartRenderer, ChartSpec
+from core.correlation import STREAMING_CORR_BYTES, target_correlations, target_correlations_chunked
 
 class FeatureAgent(BaseAgent):
     """Generates correlation heatmap for top 10 features most correlated with target."""
 
-    def __init__(self):
+    reads = ("clean_data", "target_column")
+    optional_reads = ("output_dir",)
+    writes = ("corr_plot", "corr_info", "charts")
+    artifacts = ("corr_plot",)
+
+    def __init__(self, renderer=None):
         super().__init__("FeatureAgent")
+        self.renderer = renderer or ChartRenderer()
+
+    def correlate_with_target(self, num_df, target):
+        """Target column vs every other numeric column; streamed for very large frames."""
+        if num_df.memory_usage(index=False).sum() > STREAMING_CORR_BYTES:
+            self.log("Large numeric block; computing target correlations in chunks.")
+            return target_correlations_chunked(num_df, target)
+        return target_correlations(num_df.drop(columns=[target]), num_df[target])
 
     def run(self, context):
         df = context["clean_data"]
         target = context["target_column"]
-        os.makedirs("outputs", exist_ok=True)
 
         if target not in df.columns:
             self.log("Target column missing in cleaned data; skipping feature heatmap.")
             return context
 
-        num_df = df.select_dtypes(include=["float", "int"])
+        num_df = df.select_dtypes(include="number")
         if target not in num_df.columns:
             self.log("Target is non-numeric; correlation heatmap limited to numeric proxy.")
         try:
-            corrs = num_df.corr()[target].drop(target).abs().sort_values(ascending=False)
+            corrs = self.correlate_with_target(num_df, target).abs().sort_values(ascending=False)
             top_feats = list(corrs.head(10).index)
             cols = [c for c in [target] + top_feats if c in num_df.columns]
             sub_corr = num_df[cols].corr()
@@ -30,15 +41,22 @@ class FeatureAgent(BaseAgent):
             self.log(f"Correlation computation failed: {e}")
             return context
 
-        plt.figure(figsize=(8, 6), dpi=200)
-        sns.heatmap(sub_corr, cmap="Blues", linewidths=0.3, linecolor="white", annot=False)
-        plt.title("Correlation Heatmap (Top 10 Features)")
-        plt.xticks(rotation=45, ha="right", fontsize=7)
-        plt.yticks(fontsize=7)
-        plt.tight_layout()
-        heat_path = "outputs/correlation_heatmap.png"
-        plt.savefig(heat_path)
-        plt.close()
-
-        context["corr_plot"] = heat_path
+        heatmap = self.renderer.render(ChartSpec(
+            "correlation_heatmap",
+            "heatmap",
+            {
+                "matrix": sub_corr,
+                "linewidths": 0.3,
+                "linecolor": "white",
+                "xtick_rotation": 45,
+                "xtick_ha": "right",
+                "tick_fontsize": 7,
+            },
+            title="Correlation Heatmap (Top 10 Features)",
+            figsize=(8, 6),
+        ), context.get("output_dir"))
+
+        context["corr_plot"] = heatmap.path
+        context.setdefault("charts", {})[heatmap.name] = heatmap
+        context["corr_info"] = corrs.head(10).round(3).to_dict()
         return context
@@ -1,42 +1,65 @@
 from .base_agent import BaseAgent
-import os
-from groq import Groq
+from core.llm_gateway import LLMGateway
 
+FALLBACK_TEXT = "Insight unavailable."
 
 
 class InsightAgent(BaseAgent):
     """Generates all narrative insights using Groq AI, including visual explanations."""
 
-    def __init__(self):
+    reads = ("data_profile", "target_column", "model_scores", "best_model_name", "best_model_accuracy")
+    optional_reads = ("corr_info", "target_info", "conf_matrix_info", "auc_score")
+    writes = (
+        "exec_summary", "model_story", "recommendations_text",
+        "corr_insight", "target_insight", "cm_insight", "roc_insight",
+        "model_compare_insight", "llm_latencies", "llm_failures", "llm_cache_stats",
+    )
+
+    def __init__(self, gateway=None):
         super().__init__("InsightAgent")
-        self.client =Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self.gateway = gateway or LLMGateway()
 
     def ask_ai(self, prompt):
-        try:
-            resp = self.client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.5
-            )
-            return resp.choices[0].message.content.strip()
-        except Exception as e:
-            self.log(f"AI generation failed: {e}")
-            return "Insight unavailable."
+        result = self.gateway.submit(prompt, temperature=0.5)
+        if not result.ok:
+            self.log(f"AI generation failed: {result.error}")
+            return FALLBACK_TEXT
+        return result.text
+
+    def ask_ai_many(self, prompts):
+        """Fans independent prompts out through the gateway; returns (texts, latencies) by key."""
+        results = self.gateway.ask_many(prompts, temperature=0.5)
+        answers = {}
+        for key, result in results.items():
+            if result.cached:
+                self.log(f"{key}: cache hit ({result.latency * 1000:.1f} ms)")
+                answers[key] = result.text
+            elif result.ok:
+                self.log(f"{key}: {result.latency:.2f}s ({result.attempts} attempt(s))")
+                answers[key] = result.text
+            else:
+                self.log(f"AI generation failed for {key} after {result.latency:.2f}s: {result.error}")
+                answers[key] = FALLBACK_TEXT
+        latencies = {key: round(r.latency, 3) for key, r in results.items()}
+        return answers, latencies
 
     def run(self, context):
-        df = context["raw_data"]
+        profile = context["data_profile"]
         target = context.get("target_column", "(unknown)")
 
         scores = context.get("model_scores") or {}
         best_name = context.get("best_model_name", "N/A")
         best_acc = context.get("best_model_accuracy", 0)
 
-        n_rows, n_cols = df.shape
-        schema = "\n".join([f"- {c}: {str(df[c].dtype)}" for c in df.columns[:15]])
+        n_rows, n_cols = profile.shape
+        schema = "\n".join([f"- {c}: {dtype}" for c, dtype in profile.schema(limit=15)])
 
         # -------------------------------------------------------------------
         # EXECUTIVE SUMMARY + MODEL STORY + RECOMMENDATIONS
         # -------------------------------------------------------------------
+        # None of the prompts depends on another's answer, so they are all
+        # collected first and sent through the gateway concurrently.
+        prompts = {}
         if scores:
             scores_text = ", ".join([f"{m}: {round(a, 3)}" for m, a in scores.items()])
 
@@ -67,34 +90,7 @@ Write EXACTLY 3 sections with these markers:
 
 DO NOT add anything outside markers.
 """
-
-            text = self.ask_ai(prompt)
-
-            def extract(tag, blob):
-                if tag not in blob:
-                    return ""
-                return blob.split(tag)[1].split("<")[0].strip()
-
-            exec_sum = extract("EXEC_SUM>", text)
-            model_story = extract("MODEL_STORY>", text)
-            reco = extract("RECO>", text)
-
-        else:
-            exec_sum = (
-                "The dataset contains only one target class, so modeling was skipped. "
-                "However, structural patterns, quality diagnostics, and feature behavior "
-                "still provide useful ground for future predictive work."
-            )
-            model_story = "• Not enough label diversity for model training."
-            reco = (
-                "• Collect samples representing additional target classes.\n"
-                "• Improve dataset balance before training models.\n"
-                "• Re-run the system once diversity is adequate."
-            )
-
-        context["exec_summary"] = exec_sum
-        context["model_story"] = model_story
-        context["recommendations_text"] = reco
+            prompts["narrative"] = prompt
 
         # -------------------------------------------------------------------
         # VISUAL INSIGHT ONE-LINERS
@@ -110,7 +106,7 @@ Top correlated pairs:
 
 Tone: Clean consulting tone.
 """
-        context["corr_insight"] = self.ask_ai(corr_prompt)
+        prompts["corr_insight"] = corr_prompt
 
         # 2️⃣ Target Distribution Insight
         target_info = context.get("target_info", {})
@@ -122,7 +118,7 @@ Class counts:
 
 Tone: Concise, business-friendly.
 """
-        context["target_insight"] = self.ask_ai(tgt_prompt)
+        prompts["target_insight"] = tgt_prompt
 
         # 3️⃣ Confusion Matrix Insight
         cm_info = context.get("conf_matrix_info", {})
@@ -134,7 +130,7 @@ Values:
 
 Tone: Clear and non-technical.
 """
-        context["cm_insight"] = self.ask_ai(cm_prompt)
+        prompts["cm_insight"] = cm_prompt
 
         # 4️⃣ ROC Curve Insight
         auc_val = context.get("auc_score", None)
@@ -145,7 +141,7 @@ AUC value: {auc_val}
 
 Tone: simple, insightful.
 """
-        context["roc_insight"] = self.ask_ai(roc_prompt)
+        prompts["roc_insight"] = roc_prompt
 
         # 5️⃣ Model Comparison Chart Insight
         comp_prompt = f"""
@@ -154,6 +150,47 @@ Models and accuracies:
 
 Write one sentence summarizing which model performs best and what that implies.
 """
-        context["model_compare_insight"] = self.ask_ai(comp_prompt)
+        prompts["model_compare_insight"] = comp_prompt
+
+        answers, latencies = self.ask_ai_many(prompts)
+        failures = [key for key, text in answers.items() if text == FALLBACK_TEXT]
+
+        if scores:
+            text = answers.pop("narrative")
+
+            def extract(tag, blob):
+                if tag not in blob:
+                    return ""
+                return blob.split(tag)[1].split("<")[0].strip()
+
+            exec_sum = extract("EXEC_SUM>", text)
+            model_story = extract("MODEL_STORY>", text)
+            reco = extract("RECO>", text)
+
+        else:
+            exec_sum = (
+                "The dataset contains only one target class, so modeling was skipped. "
+                "However, structural patterns, quality diagnostics, and feature behavior "
+                "still provide useful ground for future predictive work."
+            )
+            model_story = "• Not enough label diversity for model training."
+            reco = (
+                "• Collect samples representing additional target classes.\n"
+                "• Improve dataset balance before training models.\n"
+                "• Re-run the system once diversity is adequate."
+            )
+
+        context["exec_summary"] = exec_sum
+        context["model_story"] = model_story
+        context["recommendations_text"] = reco
+        context.update(answers)
+        context["llm_latencies"] = latencies
+        context["llm_failures"] = failures
+        if self.gateway.cache is not None:
+            context["llm_cache_stats"] = self.gateway.cache.stats()
 
         return context
+
+    def checkpointable(self, context):
+        # Don't pin fallback text from failed LLM calls; retry them next run.
+        return not context.get("llm_failures")
@@ -1,15 +1,343 @@
+import math
 import os
-import matplotlib.pyplot as plt
+import time
+from scipy import sparse
 from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.ensemble import (
+    ExtraTreesClassifier,
+    GradientBoostingClassifier,
+    HistGradientBoostingClassifier,
+    RandomForestClassifier,
+)
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
 from .base_agent import BaseAgent
+from core.charts import ChartRenderer, ChartSpec
+from core.encoding import dense_series, to_model_matrix
+from core.processes import process_context
+
+# Below this many training rows a process pool costs more than it saves.
+PARALLEL_MIN_ROWS = 5000
+
+# Large-data mode: above this many training rows, candidates are trained on
+# progressively larger stratified samples instead of the full training split.
+LARGE_DATA_ROWS = 200_000
+
+# "fixed" trains the three default models on all the data; "halving" races
+# a wider candidate pool on growing samples and only fully trains the best.
+MODEL_SELECTION = os.getenv("INSIGHTSPHERE_MODEL_SELECTION", "fixed")
+
+# Histogram boosting needs dense input; sparse matrices up to this size are
+# densified for it, larger ones leave it out of the candidate pool.
+DENSIFY_MAX_BYTES = 512 * 1024 * 1024
+
+
+def stratified_split(X, y, test_size, random_state=42):
+    """train_test_split, stratified unless a class is too rare for it."""
+    try:
+        return train_test_split(X, y, test_size=test_size, random_state=random_state, stratify=y)
+    except ValueError:
+        return train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+
+def stratified_sample(X, y, n_rows, random_state=42):
+    """Class-stratified row sample, falling back to a plain one for rare classes."""
+    if n_rows >= X.shape[0]:
+        return X, y
+    try:
+        X_s, _, y_s, _ = train_test_split(
+            X, y, train_size=n_rows, random_state=random_state, stratify=y
+        )
+    except ValueError:
+        X_s, _, y_s, _ = train_test_split(
+            X, y, train_size=n_rows, random_state=random_state
+        )
+    return X_s, y_s
+
+
+def _densify(X):
+    return X.toarray() if sparse.issparse(X) else X
+
+
+def _fit_and_score(name, model, X_train, y_train, X_test, y_test):
+    """Worker entry point; module-level so it can be pickled into a process pool."""
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    score = model.score(X_test, y_test)
+    return name, model, score, time.perf_counter() - start
+
 
 class ModelAgent(BaseAgent):
     """Trains multiple models and creates comparison bar chart."""
 
-    def __init__(self):
+    reads = ("clean_data", "target_column")
+    optional_reads = ("output_dir",)
+    writes = (
+        "model_scores", "best_model", "best_model_name", "best_model_accuracy",
+        "model_training_partial", "abandoned_models", "training_sample_size",
+        "training_rows_available", "training_sample_curve", "model_selection_rounds",
+        "X_test", "y_test", "feature_names", "model_bar", "charts",
+    )
+    artifacts = ("model_bar",)
+
+    def __init__(
+        self,
+        parallel=None,
+        time_budget=None,
+        n_jobs=None,
+        large_data_rows=LARGE_DATA_ROWS,
+        initial_sample=20_000,
+        growth=2.0,
+        plateau_tol=0.002,
+        renderer=None,
+        selection=None,
+        halving_factor=3,
+        halving_min_rows=1000,
+        final_candidates=3,
+    ):
+        """
+        parallel:        fit candidates concurrently in a process pool. None
+                         picks parallel mode automatically for larger training sets.
+        time_budget:     global training deadline in seconds; candidates still
+                         running when it expires are abandoned and the scores
+                         are reported as partial.
+        n_jobs:          total cores to use (defaults to all of them).
+        large_data_rows: training-set size that switches on adaptive subsampling
+                         (None disables it).
+        initial_sample, growth, plateau_tol:
+                         learning-curve schedule: start at `initial_sample` rows,
+                         multiply by `growth` each round, and stop once the best
+                         accuracy improves by less than `plateau_tol`.
+        renderer:        shared ChartRenderer for the comparison chart.
+        selection:       "fixed" or "halving" (default: INSIGHTSPHERE_MODEL_SELECTION).
+        halving_factor, halving_min_rows, final_candidates:
+                         successive halving: the whole candidate pool starts
+                         on a small stratified sample, each round keeps the
+                         best 1/`halving_factor` on `halving_factor` times
+                         more rows, and the last `final_candidates` are
+                         trained on the full training split.
+        """
         super().__init__("ModelAgent")
+        self.parallel = parallel
+        self.time_budget = time_budget
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.large_data_rows = large_data_rows
+        self.initial_sample = initial_sample
+        self.growth = growth
+        self.plateau_tol = plateau_tol
+        self.renderer = renderer or ChartRenderer()
+        self.selection = selection or MODEL_SELECTION
+        self.halving_factor = halving_factor
+        self.halving_min_rows = halving_min_rows
+        self.final_candidates = final_candidates
+
+    def build_models(self, jobs_per_model):
+        return {
+            "Logistic Regression": LogisticRegression(max_iter=2000),
+            "Random Forest": RandomForestClassifier(n_jobs=jobs_per_model),
+            "Gradient Boosting": GradientBoostingClassifier(),
+        }
+
+    def build_candidates(self, jobs_per_model, X):
+        """The wider pool raced by successive halving."""
+        # with_mean=False keeps sparse input sparse.
+        candidates = {
+            "Logistic Regression": LogisticRegression(max_iter=2000),
+            "SGD (log loss)": make_pipeline(
+                StandardScaler(with_mean=False), SGDClassifier(loss="log_loss", random_state=42)
+            ),
+            "SGD (modified Huber)": make_pipeline(
+                StandardScaler(with_mean=False), SGDClassifier(loss="modified_huber", random_state=42)
+            ),
+            "Random Forest": RandomForestClassifier(n_jobs=jobs_per_model, random_state=42),
+            "Extra Trees": ExtraTreesClassifier(n_jobs=jobs_per_model, random_state=42),
+        }
+        boosting = {
+            "Hist Gradient Boosting": HistGradientBoostingClassifier(random_state=42),
+            "Hist Gradient Boosting (deep)": HistGradientBoostingClassifier(
+                learning_rate=0.05, max_iter=300, max_leaf_nodes=63, random_state=42
+            ),
+        }
+        if sparse.issparse(X):
+            if X.shape[0] * X.shape[1] * 8 > DENSIFY_MAX_BYTES:
+                return candidates
+            boosting = {
+                name: make_pipeline(FunctionTransformer(_densify, accept_sparse=True), model)
+                for name, model in boosting.items()
+            }
+        candidates.update(boosting)
+        return candidates
+
+    def _train_serial(self, models, data, deadline):
+        results, skipped = [], []
+        for name, model in models.items():
+            # Like the parallel path, the deadline never leaves no usable model.
+            if results and deadline is not None and time.monotonic() >= deadline:
+                skipped.append(name)
+                continue
+            results.append(_fit_and_score(name, model, *data))
+        return results, skipped
+
+    def _train_parallel(self, models, data, deadline):
+        pool = process_context().Pool(processes=min(len(models), self.n_jobs))
+        try:
+            pending = {
+                name: pool.apply_async(_fit_and_score, (name, model, *data))
+                for name, model in models.items()
+            }
+            pool.close()
+
+            results = []
+            while pending:
+                for name in [n for n, res in pending.items() if res.ready()]:
+                    results.append(pending.pop(name).get())
+                if not pending:
+                    break
+                # Keep waiting past the deadline only until one model is usable.
+                if deadline is not None and time.monotonic() >= deadline and results:
+                    break
+                next(iter(pending.values())).wait(0.05)
+            return results, list(pending)
+        finally:
+            # Abandoned candidates are killed rather than left burning cores.
+            pool.terminate()
+            pool.join()
+
+    def _train(self, X_train, y_train, X_test, y_test, deadline, build=None, names=None):
+        """
+        Fit `build(jobs_per_model)` (default: build_models), restricted to
+        `names` when given (and trained in that order), and score each model
+        on the test data.
+        """
+        build = build or self.build_models
+        parallel = self.parallel
+        if parallel is None:
+            parallel = self.n_jobs > 1 and X_train.shape[0] >= PARALLEL_MIN_ROWS
+
+        # Split the cores between concurrently trained candidates so the
+        # estimators that support n_jobs don't oversubscribe the machine.
+        n_models = len(names) if names is not None else len(build(1))
+        jobs_per_model = max(1, self.n_jobs // n_models) if parallel else self.n_jobs
+        models = build(jobs_per_model)
+        if names is not None:
+            models = {name: models[name] for name in names if name in models}
+
+        data = (X_train, y_train, X_test, y_test)
+        mode = "parallel" if parallel else "serial"
+        self.log(f"Training {len(models)} models on {X_train.shape[0]} rows ({mode})...")
+        if parallel:
+            results, skipped = self._train_parallel(models, data, deadline)
+        else:
+            results, skipped = self._train_serial(models, data, deadline)
+
+        # Report in candidate order regardless of completion order.
+        by_name = {r[0]: r for r in results}
+        return [by_name[name] for name in models if name in by_name], skipped
+
+    def _train_adaptive(self, X_train, y_train, X_test, y_test, deadline):
+        """
+        Learning-curve training for large datasets: fit on growing stratified
+        samples until the best accuracy plateaus, the sample reaches the full
+        training split, or the time budget runs out. Sample sizes are judged
+        on a validation slice of the training split; the test set only scores
+        the models of the chosen size.
+        """
+        X_fit, X_val, y_fit, y_val = stratified_split(X_train, y_train, test_size=0.2)
+        size = min(self.initial_sample, X_fit.shape[0])
+        curve = []
+        best = None
+        prev_top = None
+        while True:
+            X_s, y_s = stratified_sample(X_fit, y_fit, size)
+            results, skipped = self._train(X_s, y_s, X_val, y_val, deadline)
+            if not results:
+                break
+            top = max(r[2] for r in results)
+            curve.append({"rows": X_s.shape[0], "best_val_accuracy": top})
+            self.log(f"Sample of {X_s.shape[0]} rows → best validation accuracy {top:.4f}")
+
+            # A round cut short by the deadline doesn't replace a complete one.
+            if skipped and best is not None:
+                self.log("Training budget reached; keeping previous sample size.")
+                break
+            best = (results, skipped, X_s.shape[0])
+
+            if skipped or (deadline is not None and time.monotonic() >= deadline):
+                self.log("Training budget reached; stopping sample growth.")
+                break
+            if prev_top is not None and top - prev_top < self.plateau_tol:
+                self.log(f"Accuracy plateaued (gain {top - prev_top:+.4f}); stopping sample growth.")
+                break
+            if size >= X_fit.shape[0]:
+                break
+            prev_top = top
+            size = min(int(size * self.growth), X_fit.shape[0])
+
+        if best is None:
+            return [], list(self.build_models(1)), 0, curve
+        results, skipped, rows = best
+        results = [(name, model, model.score(X_test, y_test), elapsed) for name, model, _, elapsed in results]
+        return results, skipped, rows, curve
+
+    def _train_halving(self, X_train, y_train, X_test, y_test, deadline):
+        """
+        Successive halving: every candidate is fitted on a small stratified
+        sample and scored on a validation slice of the training split; each
+        round keeps the best 1/factor of them and gives the survivors
+        `factor` times more rows. The last `final_candidates` are trained on
+        the full training split and scored on the test set like fixed mode,
+        best first, so the deadline never leaves none of them trained. The
+        last value returned says whether a round was cut short.
+        """
+        build = lambda jobs: self.build_candidates(jobs, X_train)
+        survivors = list(build(1))
+        factor = self.halving_factor
+
+        X_fit, X_val, y_fit, y_val = stratified_split(X_train, y_train, test_size=0.2)
+        rounds_needed = max(0, math.ceil(math.log(len(survivors) / self.final_candidates, factor)))
+        rows = max(self.halving_min_rows, X_fit.shape[0] // factor ** rounds_needed)
+
+        history = []
+        abandoned = []
+        cut_short = False
+        while len(survivors) > self.final_candidates and rows < X_fit.shape[0]:
+            X_s, y_s = stratified_sample(X_fit, y_fit, rows)
+            results, skipped = self._train(X_s, y_s, X_val, y_val, deadline, build=build, names=survivors)
+            cut_short = cut_short or bool(skipped)
+            if not results:
+                # Nothing finished: keep the previous survivors rather than none.
+                break
+            ranked = sorted(results, key=lambda r: r[2], reverse=True)
+            keep = max(self.final_candidates, math.ceil(len(survivors) / factor))
+            survivors = [r[0] for r in ranked[:keep]]
+            if skipped:
+                # Candidates the deadline cut from the round still get a full
+                # fit if time allows, filling the final slots after the ranked ones.
+                room = max(self.final_candidates - len(survivors), 0)
+                survivors += skipped[:room]
+                abandoned += skipped[room:]
+            history.append({
+                "rows": X_s.shape[0],
+                "scores": {r[0]: round(float(r[2]), 4) for r in ranked},
+                "seconds": {r[0]: round(r[3], 3) for r in ranked},
+                "kept": list(survivors),
+            })
+            self.log(
+                f"Halving round on {X_s.shape[0]} rows: kept {', '.join(survivors)}"
+                + (f" ({len(skipped)} not evaluated before the time budget ran out)" if skipped else "")
+            )
+            if skipped or (deadline is not None and time.monotonic() >= deadline):
+                break
+            rows *= factor
+
+        results, skipped = self._train(X_train, y_train, X_test, y_test, deadline, build=build, names=survivors)
+        if len(results) < self.final_candidates and (abandoned or skipped):
+            self.log(
+                f"Only {len(results)} of {self.final_candidates} final candidates were fully trained "
+                "before the time budget ran out."
+            )
+        return results, abandoned + skipped, history, cut_short
 
     def run(self, context):
         df = context["clean_data"]
@@ -22,58 +350,79 @@ class ModelAgent(BaseAgent):
             context["best_model_accuracy"] = None
             return context
 
-        X = df.drop(columns=[target])
-        y = df[target]
+        # Sparse one-hot columns reach the estimators as a CSR matrix
+        X, feature_names = to_model_matrix(df.drop(columns=[target]))
+        y = dense_series(df[target])
 
-        try:
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, stratify=y
-            )
-        except ValueError:
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42
-            )
+        X_train, X_test, y_train, y_test = stratified_split(X, y, test_size=0.2)
 
-        models = {
-            "Logistic Regression": LogisticRegression(max_iter=2000),
-            "Random Forest": RandomForestClassifier(),
-            "Gradient Boosting": GradientBoostingClassifier(),
-        }
+        deadline = None
+        if self.time_budget is not None:
+            deadline = time.monotonic() + self.time_budget
+
+        curve = None
+        halving = None
+        cut_short = False
+        if self.selection == "halving":
+            results, skipped, halving, cut_short = self._train_halving(X_train, y_train, X_test, y_test, deadline)
+            sample_rows = X_train.shape[0]
+        elif self.large_data_rows is not None and X_train.shape[0] > self.large_data_rows:
+            self.log(f"Large dataset ({X_train.shape[0]} training rows) — using adaptive subsampling.")
+            results, skipped, sample_rows, curve = self._train_adaptive(
+                X_train, y_train, X_test, y_test, deadline
+            )
+        else:
+            results, skipped = self._train(X_train, y_train, X_test, y_test, deadline)
+            sample_rows = X_train.shape[0]
 
         scores = {}
         best_model = None
         best_model_name = None
         best_score = -1.0
 
-        for name, model in models.items():
-            model.fit(X_train, y_train)
-            score = model.score(X_test, y_test)
+        for name, model, score, elapsed in results:
+            self.log(f"{name}: accuracy={score:.3f} in {elapsed:.2f}s")
             scores[name] = score
             if score > best_score:
                 best_score = score
                 best_model = model
                 best_model_name = name
 
+        if skipped:
+            self.log(f"⚠ Training budget exhausted; abandoned: {', '.join(skipped)}")
+
         context["model_scores"] = scores
         context["best_model"] = best_model
         context["best_model_name"] = best_model_name
         context["best_model_accuracy"] = best_score
+        context["model_training_partial"] = bool(skipped) or cut_short
+        context["abandoned_models"] = skipped
+        context["training_sample_size"] = sample_rows
+        context["training_rows_available"] = X_train.shape[0]
+        context["training_sample_curve"] = curve
+        context["model_selection_rounds"] = halving
         context["X_test"] = X_test
+        context["feature_names"] = feature_names
         context["y_test"] = y_test
 
-        os.makedirs("outputs", exist_ok=True)
-        plt.figure(figsize=(6, 4), dpi=200)
-        names = list(scores.keys())
-        vals = list(scores.values())
-        plt.bar(names, vals)
-        plt.title("Model Accuracy Comparison")
-        plt.ylabel("Accuracy")
-        plt.ylim(0, 1.0)
-        plt.xticks(rotation=20)
-        plt.tight_layout()
-        bar_path = "outputs/model_comparison_bar.png"
-        plt.savefig(bar_path)
-        plt.close()
-
-        context["model_bar"] = bar_path
+        bar = self.renderer.render(ChartSpec(
+            "model_comparison_bar",
+            "bar",
+            {
+                "labels": list(scores.keys()),
+                "values": list(scores.values()),
+                "ylabel": "Accuracy",
+                "ylim": (0, 1.0),
+                "xtick_rotation": 20,
+            },
+            title="Model Accuracy Comparison",
+            figsize=(6, 4),
+        ), context.get("output_dir"))
+
+        context["model_bar"] = bar.path
+        context.setdefault("charts", {})[bar.name] = bar
         return context
+
+    def checkpointable(self, context):
+        # Scores cut short by the time budget shouldn't stand in for a full run.
+        return not context.get("model_training_partial")
@@ -1,3 +1,4 @@
+import io
 import os
 from reportlab.platypus import (
     SimpleDocTemplate,
@@ -13,6 +14,8 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 
 from .base_agent import BaseAgent
+from core.profile import profile_frame
+from core.vector_charts import chart_drawing
 
 NAVY = colors.HexColor("#071c3d")
 LIGHT_GREY = colors.HexColor("#666666")
@@ -21,8 +24,60 @@ LIGHT_GREY = colors.HexColor("#666666")
 class ReportAgent(BaseAgent):
     """Builds a premium InsightSphere PDF report"""
 
-    def __init__(self):
+    reads = ()
+    optional_reads = (
+        "data_profile", "raw_data", "exec_summary", "recommendations_text", "model_scores",
+        "best_model_name", "best_model_accuracy", "training_sample_size",
+        "training_rows_available", "model_training_partial", "abandoned_models",
+        "model_bar", "corr_plot", "corr_insight", "target_plot", "target_insight",
+        "conf_matrix", "cm_insight", "roc_curve", "roc_insight", "run_trace", "output_dir",
+        "charts",
+    )
+    writes = ("report_path", "report_pdf")
+    artifacts = ("report_path",)
+
+    def __init__(self, trace_appendix=False, vector_charts=True, save=True):
         super().__init__("ReportAgent")
+        # Append the per-stage run metrics (everything before this agent) to the PDF.
+        self.trace_appendix = trace_appendix
+        # Redraw charts as ReportLab vector graphics instead of embedding the PNGs.
+        self.vector_charts = vector_charts
+        # Also write the PDF to output_dir; it is always kept in memory as report_pdf.
+        self.save = save
+
+    # -------------------- CHARTS --------------------
+    def approximation_note(self, profile):
+        """How far the sketched overview figures may be off, for profiles of sampled files."""
+        bounds = profile.error_bounds
+        note = (
+            "The file was too large to analyse in full, so these figures were computed in a "
+            "single streaming pass over all of its rows. Counts, missing values, means, standard "
+            "deviations, minima and maxima are exact"
+        )
+        if bounds["quantile_rank_error"] > 0:
+            note += (
+                f"; the quartiles are approximate, within {bounds['quantile_rank_error']:.1%} of the "
+                "true rank with 99% confidence"
+            )
+        return note + "."
+
+    def chart_flowable(self, chart, path, width, height):
+        """
+        The chart as a vector Drawing, else its in-memory image bytes, else
+        the file at `path` (charts from older checkpoints); None if absent.
+        """
+        if chart is not None:
+            if chart.spec is not None:
+                if self.vector_charts:
+                    drawing = chart_drawing(chart.spec, width)
+                    if drawing is not None:
+                        return drawing
+                fig_w, fig_h = chart.spec.figsize
+                height = width * fig_h / fig_w
+            return Image(chart.buffer(), width=width, height=height)
+        if path and os.path.exists(path):
+            return Image(path, width=width, height=height)
+        return None
 
     # -------------------- HEADER --------------------
     def draw_header(self, canvas, doc):
@@ -62,11 +117,9 @@ class ReportAgent(BaseAgent):
 
     # -------------------- MAIN --------------------
     def run(self, context):
-        os.makedirs("outputs", exist_ok=True)
-        pdf_path = "outputs/InsightSphere_Report.pdf"
-
+        buffer = io.BytesIO()
         doc = SimpleDocTemplate(
-            pdf_path,
+            buffer,
             pagesize=A4,
             rightMargin=40,
             leftMargin=40,
@@ -116,13 +169,16 @@ class ReportAgent(BaseAgent):
         }
 
         # -------------------- Context --------------------
-        df = context.get("raw_data")
+        profile = context.get("data_profile")
+        if profile is None and context.get("raw_data") is not None:
+            profile = profile_frame(context["raw_data"])
         exec_summary = context.get("exec_summary", "")
         recommendations = context.get("recommendations_text", "")
 
         scores = context.get("model_scores") or {}
         best_name = context.get("best_model_name", "N/A")
         best_acc = context.get("best_model_accuracy", 0.0)
+        charts = context.get("charts") or {}
 
         story = []
 
@@ -132,8 +188,8 @@ class ReportAgent(BaseAgent):
         story.append(Spacer(1, 16))
 
         # -------------------- Dataset Overview --------------------
-        if df is not None:
-            r, c = df.shape
+        if profile is not None:
+            r, c = profile.shape
             story.append(Paragraph("Dataset Overview\n", styles["h2"]))
             story.append(
                 Paragraph(
@@ -141,9 +197,11 @@ class ReportAgent(BaseAgent):
                     styles["text"],
                 )
             )
+            if profile.approximate:
+                story.append(Paragraph(self.approximation_note(profile), styles["text"]))
 
             # Describe table
-            desc = df.describe().transpose().iloc[:6]
+            desc = profile.describe(limit=6)
             desc_data = [["Feature"] + list(desc.columns)]
             for idx, row in desc.iterrows():
                 desc_data.append([idx] + [f"{v:.2f}" for v in row.values])
@@ -163,10 +221,10 @@ class ReportAgent(BaseAgent):
             story.append(Spacer(1, 12))
 
             # Missing values
-            missing = df.isna().sum()
-            if missing.sum() > 0:
+            missing = profile.missing()
+            if len(missing):
                 miss_data = [["Column", "Missing Count"]]
-                for col, val in missing[missing > 0].items():
+                for col, val in missing.items():
                     miss_data.append([col, int(val)])
 
                 miss_tbl = Table(miss_data, hAlign="LEFT")
@@ -206,9 +264,29 @@ class ReportAgent(BaseAgent):
             story.append(tbl)
             story.append(Spacer(1, 10))
 
-            bar_path = context.get("model_bar")
-            if bar_path and os.path.exists(bar_path):
-                story.append(Image(bar_path, width=380, height=500))
+            sample_rows = context.get("training_sample_size")
+            available_rows = context.get("training_rows_available")
+            if sample_rows and available_rows and sample_rows < available_rows:
+                story.append(
+                    Paragraph(
+                        f"Models were trained on an adaptive stratified sample of <b>{sample_rows:,}</b> "
+                        f"of {available_rows:,} training rows, grown until accuracy plateaued or the time budget ran out.",
+                        styles["italic"],
+                    )
+                )
+
+            if context.get("model_training_partial") and context.get("abandoned_models"):
+                abandoned = ", ".join(context["abandoned_models"])
+                story.append(
+                    Paragraph(
+                        f"<b>Partial results:</b> the training time budget ran out before {abandoned} finished.",
+                        styles["italic"],
+                    )
+                )
+
+            bar = self.chart_flowable(charts.get("model_comparison_bar"), context.get("model_bar"), 380, 500)
+            if bar is not None:
+                story.append(bar)
                 story.append(
                     Paragraph(
                         f"The comparison shows <b>{best_name}</b> achieved the highest performance with an accuracy of {best_acc:.2f}.",
@@ -221,16 +299,17 @@ class ReportAgent(BaseAgent):
         story.append(Paragraph("Visual Insights\n", styles["h2"]))
 
         visuals = [
-            ("Correlation Heatmap", context.get("corr_plot"), context.get("corr_insight")),
-            ("Target Distribution", context.get("target_plot"), context.get("target_insight")),
-            ("Confusion Matrix", context.get("conf_matrix"), context.get("cm_insight")),
-            ("ROC Curve", context.get("roc_curve"), context.get("roc_insight")),
+            ("Correlation Heatmap", "correlation_heatmap", context.get("corr_plot"), context.get("corr_insight")),
+            ("Target Distribution", "target_distribution", context.get("target_plot"), context.get("target_insight")),
+            ("Confusion Matrix", "confusion_matrix", context.get("conf_matrix"), context.get("cm_insight")),
+            ("ROC Curve", "roc_curve", context.get("roc_curve"), context.get("roc_insight")),
         ]
 
-        for title, img, explanation in visuals:
-            if img and os.path.exists(img):
+        for title, chart_name, img, explanation in visuals:
+            flowable = self.chart_flowable(charts.get(chart_name), img, 380, 220)
+            if flowable is not None:
                 story.append(Paragraph(title, styles["h3"]))
-                story.append(Image(img, width=380, height=220))
+                story.append(flowable)
                 if explanation:
                     story.append(Paragraph(explanation, styles["italic"]))
                 story.append(Spacer(1, 12))
@@ -244,6 +323,44 @@ class ReportAgent(BaseAgent):
                 if line.strip():
                     story.append(Paragraph(f"➤ {line.strip()}", styles["bullet"]))
 
+        # -------------------- Appendix: Run Metrics --------------------
+        run_trace = context.get("run_trace")
+        if self.trace_appendix and run_trace is not None:
+            summary = run_trace.summary()
+            story.append(PageBreak())
+            story.append(Paragraph("Appendix: Run Metrics", styles["h2"]))
+            story.append(
+                Paragraph(
+                    f"Run <b>{summary['run_id']}</b>: {summary['wall_seconds']:.2f}s before report generation, "
+                    f"peak memory {summary['peak_rss_mb'] or 0:.0f} MB, "
+                    f"{summary['llm']['calls']} LLM call(s) ({summary['llm']['cache_hits']} cached).",
+                    styles["text"],
+                )
+            )
+            trace_data = [["Agent", "Wall (s)", "CPU (s)", "Peak RSS (MB)", "Input", "LLM calls"]]
+            for st in summary["stages"]:
+                shape = st.get("input_shape")
+                trace_data.append([
+                    st["agent"],
+                    f"{st['wall_seconds']:.2f}",
+                    f"{st['cpu_seconds']:.2f}",
+                    f"{st['peak_rss_mb'] or 0:.0f}",
+                    " x ".join(str(n) for n in shape) if shape else "-",
+                    str(st["llm"]["calls"]),
+                ])
+            trace_tbl = Table(trace_data, hAlign="LEFT")
+            trace_tbl.setStyle(
+                TableStyle(
+                    [
+                        ("BACKGROUND", (0, 0), (-1, 0), NAVY),
+                        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+                        ("GRID", (0, 0), (-1, -1), 0.3, colors.grey),
+                        ("FONTSIZE", (0, 0), (-1, -1), 8),
+                    ]
+                )
+            )
+            story.append(trace_tbl)
+
         # -------------------- Build --------------------
         doc.build(
             story,
@@ -251,6 +368,19 @@ class ReportAgent(BaseAgent):
             onLaterPages=self.footer_canvas,
         )
 
-        context["report_path"] = pdf_path
-        self.log(f"Report generated at {pdf_path}")
+        context["report_pdf"] = buffer.getvalue()
+        context["report_path"] = None
+        if self.save:
+            out_dir = context.get("output_dir") or "outputs"
+            os.makedirs(out_dir, exist_ok=True)
+            pdf_path = os.path.join(out_dir, "InsightSphere_Report.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(context["report_pdf"])
+            context["report_path"] = pdf_path
+        self.log(f"Report generated ({len(context['report_pdf']) / 1024:.0f} KB)"
+                 + (f" at {context['report_path']}" if context["report_path"] else ""))
         return context
+
+    def checkpointable(self, context):
+        # The run-metrics appendix describes this run; a restored PDF would show an earlier one's.
+        return not self.trace_appendix
@@ -1,16 +1,16 @@
 from .base_agent import BaseAgent
-import os
-from groq import Groq
-
-
+from core.llm_gateway import LLMGateway
 
 
 class TargetAgent(BaseAgent):
     """Uses Groq LLM to infer the most likely target column, with fallbacks."""
 
-    def __init__(self):
+    reads = ("clean_data",)
+    writes = ("target_column", "target_source", "target_ai_error")
+
+    def __init__(self, gateway=None):
         super().__init__("TargetAgent")
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self.gateway = gateway or LLMGateway()
 
     def _ask_ai_for_target(self, df):
         schema_lines = [f"{c}: {str(df[c].dtype)}" for c in df.columns]
@@ -24,12 +24,7 @@ class TargetAgent(BaseAgent):
             "Reply with only the exact column name."
         )
 
-        resp = self.client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.0,
-        )
-        answer = resp.choices[0].message.content.strip()
+        answer = self.gateway.ask(prompt, temperature=0.0)
         return answer.replace('"', "").replace("'", "").strip()
 
     def run(self, context):
@@ -37,12 +32,15 @@ class TargetAgent(BaseAgent):
         self.log("🤖 AI inferring target column...")
 
         target_col = None
+        source = "ai"
+        ai_error = None
         try:
             ai_guess = self._ask_ai_for_target(df)
             if ai_guess in df.columns:
                 target_col = ai_guess
                 self.log(f"AI selected target = {ai_guess}")
         except Exception as e:
+            ai_error = str(e)
             self.log(f"AI target inference failed: {e}")
 
         if target_col is None:
@@ -51,12 +49,20 @@ class TargetAgent(BaseAgent):
                 low = col.lower()
                 if any(k in low for k in priority_keywords):
                     target_col = col
+                    source = "keyword"
                     self.log(f"Fallback target detected = {col}")
                     break
 
         if target_col is None:
             target_col = df.columns[-1]
+            source = "last_column"
             self.log(f"Using last column as target = {target_col}")
 
         context["target_column"] = target_col
+        context["target_source"] = source
+        context["target_ai_error"] = ai_error
         return context
+
+    def checkpointable(self, context):
+        # A fallback chosen because the LLM was unreachable should be retried next run.
+        return context.get("target_ai_error") is None
@@ -1,15 +1,16 @@
 import streamlit as st
-import pandas as pd
-import json
-import sqlite3
-import xml.etree.ElementTree as ET
-import yaml
-import zipfile
-import io
 import time
 
 
-from core.coordinator import PipelineCoordinator
+from core.ingest import (
+    DEFAULT_MEMORY_BUDGET_MB,
+    SUPPORTED_EXTENSIONS,
+    UnsupportedFormat,
+    read_dataset,
+    sqlite_tables,
+)
+from core.runtime import get_job_manager, prewarm
+from core.upload_cache import UploadCache, content_hash
 
 # ----------------------------------------------------
 # PAGE CONFIG
@@ -88,82 +89,141 @@ st.markdown(
 # ----------------------------------------------------
 uploaded = st.file_uploader(
     "Upload dataset",
-    type=[
-        "csv", "xlsx", "json", "sql", "sqlite",
-        "xml", "txt", "tsv", "log", "dat", "yaml", "yml",
-        "parquet", "zip"
-    ],
+    type=list(SUPPORTED_EXTENSIONS),
 )
 
+# The uploader is on screen: load the ML stack and build the shared
+# pipeline in the background while the user picks a file.
+prewarm()
+
 # ----------------------------------------------------
 # SMART UNIVERSAL FILE READER
 # ----------------------------------------------------
-def load_file(uploaded):
-    name = uploaded.name.lower()
-
-    if name.endswith(".csv"):
-        return pd.read_csv(uploaded)
-
-    elif name.endswith(".xlsx"):
-        return pd.read_excel(uploaded)
-
-    elif name.endswith(".json"):
-        return pd.read_json(uploaded)
-
-    elif name.endswith(".sqlite") or name.endswith(".sql"):
-        conn = sqlite3.connect(uploaded)
-        tables = conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
-        if tables:
-            tname = tables[0][0]
-            return pd.read_sql(f"SELECT * FROM {tname}", conn)
-
-    elif name.endswith(".xml"):
-        tree = ET.parse(uploaded)
-        root = tree.getroot()
-        rows = [{elem.tag: elem.text for elem in child} for child in root]
-        return pd.DataFrame(rows)
-
-    elif name.endswith(".yaml") or name.endswith(".yml"):
-        data = yaml.safe_load(uploaded)
-        return pd.DataFrame(data)
-
-    elif name.endswith(".txt") or name.endswith(".log") or name.endswith(".tsv") or name.endswith(".dat"):
-        return pd.read_csv(uploaded, sep=None, engine="python")
-
-    elif name.endswith(".parquet"):
-        return pd.read_parquet(uploaded)
-
-    elif name.endswith(".zip"):
-        with zipfile.ZipFile(uploaded) as z:
-            for f in z.namelist():
-                if f.endswith(".csv"):
-                    return pd.read_csv(z.open(f))
-                elif f.endswith(".xlsx"):
-                    return pd.read_excel(z.open(f))
-        st.warning("⚠ ZIP detected but no supported file inside.")
-        return None
+upload_cache = UploadCache()
+
+
+@st.cache_data(show_spinner=False)
+def list_tables(db_path):
+    return sqlite_tables(db_path)
+
+
+def choose_sqlite_source(uploaded, key):
+    """
+    Table, column and sample pickers for a SQLite upload. Returns the path
+    of the stored database and the read options, or (None, None).
+    """
+    db_path = upload_cache.database_path(key, uploaded.getbuffer())
+    try:
+        tables = list_tables(db_path)
+    except UnsupportedFormat as e:
+        st.error(f"❌ {e}")
+        return None, None
+    if not tables:
+        st.error("❌ The database contains no tables.")
+        return None, None
+
+    labels = [f"{t['name']} ({t['rows']:,} rows)" for t in tables]
+    table = tables[st.selectbox("Table", range(len(tables)), format_func=labels.__getitem__)]
+    columns = st.multiselect("Columns", table["columns"], default=table["columns"])
+    sample_rows = st.number_input(
+        "Sample rows (0 = as many as the memory budget allows)", min_value=0, value=0, step=10_000
+    )
+    return db_path, {"table": table["name"], "columns": columns or None, "sample_rows": int(sample_rows) or None}
+
+
+def load_file(uploaded, on_preview=None):
+    """
+    Parses the upload within the memory budget. Streamed formats call
+    `on_preview` with their first chunk before the rest is read; SQLite
+    uploads first ask which table, columns and how many rows to read.
 
+    Parsed uploads are cached as Feather files keyed by content hash, so
+    widget reruns and re-uploads skip parsing entirely; the hash itself is
+    computed once per upload and kept in the session. Returns the content
+    key and the IngestResult (None when the format isn't supported).
+    """
+    # file_id changes on every upload, even of an edited file with the same name and size.
+    upload_id = uploaded.file_id
+    known = st.session_state.get("upload_key")
+    if known and known[0] == upload_id:
+        key = known[1]
     else:
-        st.error("❌ Unsupported format.")
-        return None
+        key = content_hash(uploaded.getbuffer(), uploaded.name.lower(), DEFAULT_MEMORY_BUDGET_MB)
+        st.session_state["upload_key"] = (upload_id, key)
+    source, options = uploaded, {}
+    if uploaded.name.lower().endswith((".sqlite", ".sql")):
+        source, options = choose_sqlite_source(uploaded, key)
+        if source is None:
+            return key, None
+        key = content_hash(key.encode("ascii"), repr(sorted(options.items())))
+    result = upload_cache.get(key)
+    if result is None:
+        try:
+            result = read_dataset(source, uploaded.name, on_preview=on_preview, **options)
+        except UnsupportedFormat as e:
+            st.error(f"❌ {e}")
+            return key, None
+        upload_cache.put(key, result)
+    if result.notice:
+        st.warning(result.notice)
+    return key, result
 
 
 # ---------------------------------------------------
 # PIPELINE EXECUTION
 # ---------------------------------------------------
+def render_preview(frame):
+    preview_title.markdown("<span class='preview-title'>🔍 Data Preview</span>", unsafe_allow_html=True)
+    preview_table.dataframe(frame.head())
+    previewed.append(True)
+
+
 if uploaded:
-    df = load_file(uploaded)
+    preview_title = st.empty()
+    preview_table = st.empty()
+    previewed = []
+
+    jobs = get_job_manager()
+    upload_id = uploaded.file_id
+    if st.session_state.get("job_upload") != upload_id:
+        st.session_state.pop("job_id", None)
+    job_id = st.session_state.get("job_id")
+    try:
+        running = bool(job_id) and jobs.status(job_id)["status"] in ("queued", "running")
+    except KeyError:
+        running = False
 
-    if df is not None:
+    if running:
+        # The upload was parsed when the job was submitted; the polling
+        # reruns below only redraw its preview.
+        result = None
+        render_preview(st.session_state["job_preview"])
+    else:
+        key, result = load_file(uploaded, on_preview=render_preview)
 
-        st.markdown("<span class='preview-title'>🔍 Data Preview</span>", unsafe_allow_html=True)
-        st.dataframe(df.head())
+    if result is not None:
+        df = result.df
+
+        if not previewed:
+            render_preview(df)
 
         if st.button("🚀 Activate InsightSphere"):
+            # Runs in the background; this page polls it below.
+            st.session_state["job_id"] = jobs.submit(df, data_key=key, source_profile=result.profile)
+            st.session_state["job_upload"] = upload_id
+            st.session_state["job_preview"] = df.head()
+
+    job_id = st.session_state.get("job_id")
+    if job_id:
+        try:
+            job = jobs.status(job_id)
+        except KeyError:
+            st.session_state.pop("job_id", None)
+            job = None
 
+        if job and job["status"] in ("queued", "running"):
             status_placeholder = st.empty()
 
-           
             spinner_html = """
             <div style="
                 background: rgba(0, 122, 255, 0.25); 
@@ -176,31 +236,44 @@ if uploaded:
                 color: white;
                 backdrop-filter: blur(3px); 
                 border: 1px solid rgba(0,122,255,0.25); 
-}
             ">
              🧠 Turning your data into insights........hang tight!
             </div>
             """
             status_placeholder.markdown(spinner_html, unsafe_allow_html=True)
 
-            #  Run your pipeline normally (NO Streamlit spinner)
-            result = PipelineCoordinator().run(df)
+            if job["status"] == "queued":
+                st.caption("⏳ Waiting for a free worker…")
+            icons = {"started": "⏳", "finished": "✅", "restored": "♻️", "failed": "❌"}
+            for agent_name, stage in job["stages"].items():
+                st.caption(f"{icons.get(stage['status'], '•')} {agent_name} — {stage['elapsed']:.1f}s")
+
+            if job["cancel_requested"]:
+                st.caption("Cancelling after the current step…")
+            elif st.button("✖ Cancel"):
+                jobs.cancel(job_id)
 
-            # Remove the loading bar and show success message
-            status_placeholder.empty()
+            time.sleep(1)
+            st.rerun()
 
+        elif job and job["status"] == "done":
             st.success("✨ Your insights are ready!")
 
-            report_path = result.get("report_path")
-            if report_path:
-                with open(report_path, "rb") as f:
-                    st.download_button(
-                        "📥 Download Your Insight Report",
-                        data=f,
-                        file_name="InsightSphere_Report.pdf",
-                        mime="application/pdf",
-                        help="Your AI-generated report 🤍",
-                        width="stretch"
-                    )
+            report_pdf = jobs.report(job_id)
+            if report_pdf:
+                st.download_button(
+                    "📥 Download Your Insight Report",
+                    data=report_pdf,
+                    file_name="InsightSphere_Report.pdf",
+                    mime="application/pdf",
+                    help="Your AI-generated report 🤍",
+                    width="stretch"
+                )
             else:
                 st.error("⚠ Report was not generated.")
+
+        elif job and job["status"] == "cancelled":
+            st.info("Run cancelled.")
+
+        elif job:
+            st.error(f"⚠ The run failed: {job['error']}")
@@ -0,0 +1,206 @@
+"""
+Headless batch runs: one InsightSphere report per dataset, many datasets at
+a time.
+
+    python batch.py extracts/ --jobs 4 --output-dir reports
+    python batch.py "extracts/*.csv" other.parquet --summary reports/summary.json
+
+Inputs may be files, directories (every supported file directly inside
+them, or below them with --recursive) or glob patterns. Each dataset runs
+in a worker process and writes its charts, report and agent log to its own
+directory under --output-dir. A JSON summary with per-file status, timings
+and model scores goes to --summary (stdout by default); the exit status is
+1 when any file failed.
+"""
+import argparse
+import contextlib
+import glob
+import json
+import mmap
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from core.ingest import DEFAULT_MEMORY_BUDGET_MB, SUPPORTED_EXTENSIONS, UnsupportedFormat, read_dataset
+from core.upload_cache import content_hash
+
+_coordinator = None
+
+
+def collect_inputs(patterns, recursive=False):
+    """Expand files, directories and globs into a sorted list of supported files."""
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            walker = os.walk(pattern) if recursive else [(pattern, [], os.listdir(pattern))]
+            candidates = [os.path.join(root, f) for root, _, files in walker for f in files]
+        else:
+            candidates = glob.glob(pattern, recursive=recursive)
+        for path in candidates:
+            if os.path.isfile(path) and path.lower().rsplit(".", 1)[-1] in SUPPORTED_EXTENSIONS:
+                found.add(os.path.normpath(path))
+    return sorted(found)
+
+
+def output_dirs(paths, output_root):
+    """One directory per input, named after the file (suffixed when names collide)."""
+    dirs, used = {}, set()
+    for path in paths:
+        base = os.path.splitext(os.path.basename(path))[0] or "dataset"
+        name, n = base, 1
+        while name in used:
+            n += 1
+            name = f"{base}_{n}"
+        used.add(name)
+        dirs[path] = os.path.join(output_root, name)
+    return dirs
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+def _init_worker(model_jobs):
+    # One warm coordinator per worker process, reused for every file it gets.
+    global _coordinator
+    from core.charts import ChartRenderer
+    from core.coordinator import PipelineCoordinator
+
+    # Workers already run side by side: no nested chart pool, and model
+    # training limited to this worker's share of the cores.
+    _coordinator = PipelineCoordinator(renderer=ChartRenderer(parallel=False), model_jobs=model_jobs)
+
+
+def process_file(path, output_dir, memory_budget_mb=None):
+    """Run the pipeline on one file; returns its summary record (never raises)."""
+    record = {"file": path, "output_dir": output_dir, "status": "ok"}
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    log_path = os.path.join(output_dir, "run.log")
+    try:
+        with open(log_path, "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+            data_key = _file_hash(path, memory_budget_mb)
+            result = read_dataset(path, os.path.basename(path), memory_budget_mb)
+            record["read_seconds"] = round(time.perf_counter() - start, 3)
+            record["rows"], record["columns"] = result.df.shape
+            record["rows_seen"] = result.rows_seen
+            record["sampled"] = result.sampled
+
+            context = _coordinator.run(
+                result.df, data_key=data_key, output_dir=output_dir, source_profile=result.profile
+            )
+    except UnsupportedFormat as e:
+        record.update(status="unsupported", error=str(e))
+    except Exception as e:
+        record.update(status="failed", error=f"{type(e).__name__}: {e}")
+        with open(log_path, "a", encoding="utf-8") as log:
+            log.write(traceback.format_exc())
+    else:
+        scores = context.get("model_scores") or {}
+        record.update(
+            report_path=context.get("report_path"),
+            target_column=context.get("target_column"),
+            best_model=context.get("best_model_name"),
+            best_model_accuracy=_number(context.get("best_model_accuracy")),
+            model_scores={name: _number(score) for name, score in scores.items()},
+            stage_seconds=context.get("stage_timings"),
+            critical_path=context.get("critical_path"),
+        )
+        if not record["report_path"]:
+            record.update(status="failed", error="No report was generated")
+    record["log"] = log_path
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def _file_hash(path, memory_budget_mb):
+    # Same key scheme as the app's upload cache, without reading the file into memory.
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return content_hash(b"", os.path.basename(path).lower(), memory_budget_mb)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return content_hash(data, os.path.basename(path).lower(), memory_budget_mb)
+
+
+def _number(value):
+    return None if value is None else round(float(value), 4)
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def run_batch(paths, output_root, jobs, memory_budget_mb=None, model_jobs=None, on_result=None):
+    """Process `paths` on `jobs` worker processes; returns records in input order."""
+    dirs = output_dirs(paths, output_root)
+    model_jobs = model_jobs or max(1, (os.cpu_count() or 1) // jobs)
+    records = {}
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(model_jobs,)) as pool:
+        futures = {pool.submit(process_file, p, dirs[p], memory_budget_mb): p for p in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:  # the worker process itself died
+                record = {"file": path, "output_dir": dirs[path], "status": "failed",
+                          "error": f"{type(e).__name__}: {e}"}
+            records[path] = record
+            if on_result is not None:
+                on_result(record)
+    return [records[p] for p in paths]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="files, directories or glob patterns")
+    parser.add_argument("-j", "--jobs", type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help="datasets processed at once (worker processes)")
+    parser.add_argument("-o", "--output-dir", default="batch_outputs", help="one subdirectory per dataset goes here")
+    parser.add_argument("--summary", help="write the JSON summary here instead of stdout")
+    parser.add_argument("--recursive", action="store_true", help="descend into directories / allow ** in globs")
+    parser.add_argument("--memory-budget-mb", type=float, default=DEFAULT_MEMORY_BUDGET_MB,
+                        help="per-dataset ingestion budget before sampling")
+    parser.add_argument("--model-jobs", type=int, help="training cores per dataset (default: cores / jobs)")
+    args = parser.parse_args(argv)
+
+    paths = collect_inputs(args.inputs, args.recursive)
+    if not paths:
+        print("No supported input files found.", file=sys.stderr)
+        return 2
+    jobs = max(1, min(args.jobs, len(paths)))
+    print(f"Processing {len(paths)} file(s) with {jobs} worker(s)...", file=sys.stderr)
+
+    def report(record):
+        detail = record.get("best_model") or record.get("error", "")
+        print(f"  [{record['status']:>11}] {record['file']} ({record.get('seconds', 0):.1f}s) {detail}",
+              file=sys.stderr)
+
+    started = time.time()
+    records = run_batch(paths, args.output_dir, jobs, args.memory_budget_mb, args.model_jobs, on_result=report)
+    counts = {}
+    for r in records:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    summary = {
+        "started": started,
+        "wall_seconds": round(time.time() - started, 3),
+        "jobs": jobs,
+        "output_dir": args.output_dir,
+        "counts": counts,
+        "files": records,
+    }
+
+    text = json.dumps(summary, indent=2, default=str)
+    if args.summary:
+        os.makedirs(os.path.dirname(args.summary) or ".", exist_ok=True)
+        with open(args.summary, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Summary written to {args.summary}", file=sys.stderr)
+    else:
+        print(text)
+    return 0 if counts.get("ok", 0) == len(records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Cold import times, each measured in a fresh interpreter: what the landing
+page pays before the uploader renders, what the pipeline pays on first
+use, and the heavy third-party packages behind it.
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --repeat 5 --detail core.coordinator
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GROUPS = {
+    "landing page": ["streamlit", "core.ingest", "core.upload_cache", "core.runtime"],
+    "pipeline (first use)": ["core.coordinator"],
+    "heavy dependencies": [
+        "sklearn.ensemble",
+        "matplotlib.figure",
+        "seaborn",
+        "reportlab.platypus",
+        "groq",
+        "scipy.sparse",
+    ],
+}
+
+_TIMER = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def import_seconds(module):
+    """Wall-clock seconds to import `module` in a new interpreter (None if it fails)."""
+    proc = subprocess.run(
+        [sys.executable, "-c", _TIMER.format(module=module)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        return None
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def heaviest_imports(module, top=15):
+    """The `top` slowest imports under `module`, by cumulative time (from -X importtime)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--detail", metavar="MODULE", help="also list the slowest imports under MODULE")
+    args = parser.parse_args()
+
+    for group, modules in GROUPS.items():
+        print(f"\n{group}")
+        for module in modules:
+            times = [import_seconds(module) for _ in range(args.repeat)]
+            if None in times:
+                print(f"  {module:<24} {'not importable':>10}")
+                continue
+            print(f"  {module:<24} {statistics.median(times):9.3f}s")
+
+    if args.detail:
+        print(f"\nslowest imports under {args.detail} (cumulative)")
+        for cumulative, own, name in heaviest_imports(args.detail):
+            print(f"  {name:<40} {cumulative / 1e6:8.3f}s   (self {own / 1e6:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
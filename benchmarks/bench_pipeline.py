@@ -0,0 +1,264 @@
+"""
+End-to-end pipeline benchmark: runs PipelineCoordinator on synthetic
+datasets with the LLM stubbed out, records time and memory per agent, and
+compares them against a stored baseline.
+
+    python -m benchmarks.bench_pipeline                          # compare with the baseline
+    python -m benchmarks.bench_pipeline --update-baseline        # record a new baseline
+    python -m benchmarks.bench_pipeline --scenarios small wide --repeat 5
+
+Baselines are machine specific: record one on the machine (or CI runner)
+that will run the comparison. The exit status is 1 when any stage slows
+down or grows by more than the tolerances.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.charts import ChartRenderer
+from core.coordinator import PipelineCoordinator
+from core.llm_gateway import LLMGateway
+from core.tracing import Tracer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# name: (rows, numeric cols, categorical cols, cardinality, missing share, classes)
+SCENARIOS = {
+    "small": (2_000, 10, 3, 5, 0.05, 2),
+    "wide": (2_000, 200, 50, 20, 0.10, 2),
+    "tall": (100_000, 10, 4, 10, 0.05, 3),
+    "highcard": (20_000, 10, 5, 5_000, 0.02, 2),
+    "multiclass": (20_000, 20, 5, 8, 0.05, 5),
+}
+
+
+def make_dataset(rows, num_cols, cat_cols, cardinality, missing, classes, seed=0):
+    """
+    Synthetic classification frame: numeric and categorical features with
+    `missing` of their cells blanked, and a `target` with `classes` roughly
+    balanced classes that depends on a few of the features.
+    """
+    rng = np.random.default_rng(seed)
+    cols = {f"num_{i}": rng.normal(size=rows) for i in range(num_cols)}
+    levels = np.array([f"v{j}" for j in range(cardinality)], dtype=object)
+    for i in range(cat_cols):
+        cols[f"cat_{i}"] = rng.choice(levels, rows)
+
+    signal = rng.normal(size=rows)
+    for i in range(min(num_cols, 3)):
+        signal += cols[f"num_{i}"]
+    if cat_cols:
+        signal += np.isin(cols["cat_0"], levels[: max(cardinality // 2, 1)]) * 1.5
+    edges = np.quantile(signal, np.linspace(0, 1, classes + 1)[1:-1])
+    target = np.searchsorted(edges, signal)
+
+    df = pd.DataFrame(cols)
+    if missing:
+        df = df.mask(rng.random(df.shape) < missing)
+    df["target"] = target
+    return df
+
+
+# ---------------------------------------------------------------------------
+# Local LLM stub: answers instantly (or after `latency`) without the network
+# ---------------------------------------------------------------------------
+
+class _Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content):
+        self.message = _Message(content)
+
+
+class _Response:
+    def __init__(self, content):
+        self.choices = [_Choice(content)]
+
+
+class StubLLMClient:
+    """Stands in for the Groq client with canned answers shaped like real ones."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages, temperature, timeout=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = messages[0]["content"]
+        if "prediction target" in prompt:
+            return _Response("target")
+        if "<EXEC_SUM>" in prompt:
+            return _Response(
+                "<EXEC_SUM>Benchmark summary.\n<MODEL_STORY>• Benchmark story.\n"
+                "<RECO>• Benchmark recommendation."
+            )
+        return _Response("Benchmark insight.")
+
+
+# ---------------------------------------------------------------------------
+# Running and comparing
+# ---------------------------------------------------------------------------
+
+def run_once(df, llm_latency=0.0, trace_memory=True, parallel=False):
+    """One pipeline run in a scratch directory; returns its run summary."""
+    coordinator = PipelineCoordinator(
+        gateway=LLMGateway(client=StubLLMClient(llm_latency), cache=False),
+        renderer=ChartRenderer(parallel=parallel),
+        parallel=parallel,
+        tracer=Tracer(sink=None, profile_dir=None, trace_memory=trace_memory),
+        # Repeats must run every stage, not restore the first run's checkpoints.
+        checkpoints=False,
+    )
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                context = coordinator.run(df.copy())
+                total = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+            coordinator.renderer.close()
+    summary = context["run_summary"]
+    summary["total_seconds"] = total
+    return summary
+
+
+def measure(df, repeat, **run_kwargs):
+    """Median time and worst memory per stage over `repeat` runs."""
+    runs = [run_once(df, **run_kwargs) for _ in range(repeat)]
+    stages = {}
+    for name in [s["agent"] for s in runs[0]["stages"]]:
+        records = [s for r in runs for s in r["stages"] if s["agent"] == name]
+        stages[name] = {
+            "seconds": round(statistics.median(s["wall_seconds"] for s in records), 4),
+            "traced_peak_mb": max(s.get("traced_peak_mb", 0.0) for s in records),
+        }
+    return {
+        "total_seconds": round(statistics.median(r["total_seconds"] for r in runs), 4),
+        "peak_rss_mb": max(r["peak_rss_mb"] or 0.0 for r in runs),
+        "stages": stages,
+    }
+
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else "-".rjust(int(spec.split(".")[0]))
+
+
+def compare(name, current, baseline, time_tol, mem_tol, min_seconds, min_mb):
+    """Print a per-stage comparison; returns the list of regressions found."""
+    baseline = baseline or {}
+    rows = [(stage, now, baseline.get("stages", {}).get(stage, {})) for stage, now in current["stages"].items()]
+    rows.append(("TOTAL", {"seconds": current["total_seconds"]}, {"seconds": baseline.get("total_seconds")}))
+
+    regressions = []
+    print(f"\n{name}")
+    print(f"  {'stage':<16} {'seconds':>9} {'baseline':>9} {'change':>8}   {'peak MB':>8} {'baseline':>9}")
+    for stage, now, base in rows:
+        t, bt = now["seconds"], base.get("seconds")
+        m, bm = now.get("traced_peak_mb"), base.get("traced_peak_mb")
+        flags = []
+        if bt is not None and t > bt * (1 + time_tol) and t - bt > min_seconds:
+            regressions.append(f"{name}/{stage}: {bt:.3f}s -> {t:.3f}s")
+            flags.append("slower")
+        if bm is not None and m is not None and m > bm * (1 + mem_tol) and m - bm > min_mb:
+            regressions.append(f"{name}/{stage}: {bm:.1f} MB -> {m:.1f} MB")
+            flags.append("more memory")
+        change = (t - bt) / bt if bt else None
+        print(
+            f"  {stage:<16} {t:9.3f} {_fmt(bt, '9.3f')} {_fmt(change, '+8.0%')}"
+            f"   {_fmt(m, '8.1f')} {_fmt(bm, '9.1f')}"
+            + (f"  << {', '.join(flags)}" if flags else "")
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=["small", "wide", "highcard"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the stubbed LLM waits per call")
+    parser.add_argument("--parallel", action="store_true", help="benchmark the concurrent scheduler instead of one stage at a time")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (faster, no per-stage memory)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed memory growth, as a fraction")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    parser.add_argument("--min-mb", type=float, default=1.0, help="ignore memory growth smaller than this")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    elif not args.update_baseline:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+
+    results = {}
+    regressions = []
+    for name in args.scenarios:
+        df = make_dataset(*SCENARIOS[name], seed=args.seed)
+        results[name] = measure(
+            df,
+            args.repeat,
+            llm_latency=args.llm_latency,
+            trace_memory=not args.no_memory,
+            parallel=args.parallel,
+        )
+        regressions += compare(
+            f"{name} ({df.shape[0]:,} x {df.shape[1]:,})",
+            results[name],
+            baseline.get("scenarios", {}).get(name),
+            args.time_tolerance,
+            args.memory_tolerance,
+            args.min_seconds,
+            args.min_mb,
+        )
+
+    if args.update_baseline:
+        scenarios = dict(baseline.get("scenarios", {}))
+        scenarios.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {
+                    "machine": {
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "cpus": os.cpu_count(),
+                    },
+                    "scenarios": scenarios,
+                },
+                f,
+                indent=2,
+            )
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if regressions:
+        print("\nRegressions:")
+        for r in regressions:
+            print(f"  {r}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import io
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Optional
+
+from matplotlib.artist import setp
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from core.processes import process_context
+
+DEFAULT_DPI = 200
+DEFAULT_FORMAT = "png"
+DEFAULT_OUTPUT_DIR = "outputs"
+
+
+@dataclass
+class ChartSpec:
+    """
+    Everything needed to draw one chart, as plain picklable data.
+
+    `name` is the file stem, `kind` picks a drawer from DRAWERS and `data`
+    holds its inputs plus optional axis styling (xlabel, ylabel, ylim,
+    xtick_rotation, xtick_ha, tick_fontsize).
+    """
+
+    name: str
+    kind: str
+    data: dict
+    title: str = ""
+    figsize: tuple = (4, 3)
+
+
+@dataclass
+class ChartResult:
+    """
+    A rendered chart: the encoded image bytes, its path once saved, and the
+    spec it was drawn from (so the report can redraw it as vector graphics).
+    """
+
+    name: str
+    format: str
+    data: bytes = field(repr=False)
+    path: Optional[str] = None
+    spec: Optional[ChartSpec] = field(default=None, repr=False)
+
+    def buffer(self):
+        return io.BytesIO(self.data)
+
+
+# ---------------------------------------------------------------------------
+# Drawers: each fills a single Axes from ChartSpec.data
+# ---------------------------------------------------------------------------
+
+def _draw_heatmap(ax, data):
+    import seaborn as sns
+
+    sns.heatmap(
+        data["matrix"],
+        ax=ax,
+        annot=data.get("annot", False),
+        fmt=data.get("fmt", ".2g"),
+        cmap=data.get("cmap", "Blues"),
+        linewidths=data.get("linewidths", 0),
+        linecolor=data.get("linecolor", "white"),
+    )
+
+
+def _draw_count(ax, data):
+    import seaborn as sns
+
+    sns.countplot(x=data["values"], ax=ax)
+
+
+def _draw_bar(ax, data):
+    ax.bar(data["labels"], data["values"])
+
+
+def _draw_roc(ax, data):
+    # Either one curve (fpr, tpr, auc) or a list of labelled "curves".
+    curves = data.get("curves") or [{"label": None, "fpr": data["fpr"], "tpr": data["tpr"], "auc": data["auc"]}]
+    for curve in curves:
+        label = f"AUC = {curve['auc']:.2f}"
+        if curve.get("label") is not None:
+            label = f"{curve['label']}: {label}"
+        ax.plot(curve["fpr"], curve["tpr"], label=label)
+    ax.plot([0, 1], [0, 1], linestyle="--", color="grey")
+    ax.legend(fontsize=7 if len(curves) > 1 else None)
+
+
+DRAWERS = {
+    "heatmap": _draw_heatmap,
+    "count": _draw_count,
+    "bar": _draw_bar,
+    "roc": _draw_roc,
+}
+
+
+def _style(ax, data):
+    if "xlabel" in data:
+        ax.set_xlabel(data["xlabel"])
+    if "ylabel" in data:
+        ax.set_ylabel(data["ylabel"])
+    if "ylim" in data:
+        ax.set_ylim(*data["ylim"])
+    xtick = {}
+    if "xtick_rotation" in data:
+        xtick["rotation"] = data["xtick_rotation"]
+    if "xtick_ha" in data:
+        xtick["ha"] = data["xtick_ha"]
+    if "tick_fontsize" in data:
+        xtick["fontsize"] = data["tick_fontsize"]
+        setp(ax.get_yticklabels(), fontsize=data["tick_fontsize"])
+    if xtick:
+        setp(ax.get_xticklabels(), **xtick)
+
+
+def render_chart(spec, dpi=DEFAULT_DPI, fmt=DEFAULT_FORMAT):
+    """
+    Draw `spec` on a standalone Figure with the Agg canvas and return the
+    encoded bytes. Never touches pyplot, so it is safe in threads and in
+    worker processes alike.
+    """
+    fig = Figure(figsize=spec.figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    DRAWERS[spec.kind](ax, spec.data)
+    if spec.title:
+        ax.set_title(spec.title)
+    _style(ax, spec.data)
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, dpi=dpi)
+    return buf.getvalue()
+
+
+class ChartRenderer:
+    """
+    Renders ChartSpecs into ChartResults, independent charts in parallel.
+
+    Charts are drawn in a small worker-process pool (kept alive between
+    calls) and written to `output_dir`; the bytes stay on the result so
+    callers can embed charts without reading the files back. Rendering falls
+    back to the calling process when there is a single chart, when
+    `parallel=False`, or if the pool breaks.
+    """
+
+    def __init__(self, dpi=DEFAULT_DPI, fmt=DEFAULT_FORMAT, output_dir=DEFAULT_OUTPUT_DIR,
+                 max_workers=None, parallel=True, save=True):
+        self.dpi = dpi
+        self.fmt = fmt
+        self.output_dir = output_dir
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.parallel = parallel and self.max_workers > 1
+        self.save = save
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=process_context()
+            )
+        return self._pool
+
+    def fingerprint(self):
+        """Settings that change the rendered output (for stage checkpoints)."""
+        return f"{self.dpi}:{self.fmt}:{self.save}"
+
+    def path_for(self, name, output_dir=None):
+        return os.path.join(output_dir or self.output_dir, f"{name}.{self.fmt}")
+
+    def _finish(self, spec, data, output_dir=None):
+        result = ChartResult(spec.name, self.fmt, data, spec=spec)
+        if self.save:
+            result.path = self.path_for(spec.name, output_dir)
+            os.makedirs(os.path.dirname(result.path), exist_ok=True)
+            with open(result.path, "wb") as f:
+                f.write(data)
+        return result
+
+    def render(self, spec, output_dir=None):
+        """Render one chart in this process; `output_dir` overrides the default for this call."""
+        return self._finish(spec, render_chart(spec, self.dpi, self.fmt), output_dir)
+
+    def submit(self, spec):
+        """Start rendering `spec`; returns a Future of the raw image bytes."""
+        if not self.parallel:
+            future = Future()
+            future.set_result(render_chart(spec, self.dpi, self.fmt))
+            return future
+        return self._executor().submit(render_chart, spec, self.dpi, self.fmt)
+
+    def render_many(self, specs, output_dir=None):
+        """Render several charts concurrently; returns {name: ChartResult} in input order."""
+        specs = list(specs)
+        if len(specs) <= 1 or not self.parallel:
+            return {spec.name: self.render(spec, output_dir) for spec in specs}
+        try:
+            futures = [self.submit(spec) for spec in specs]
+            return {spec.name: self._finish(spec, f.result(), output_dir) for spec, f in zip(specs, futures)}
+        except BrokenProcessPool:
+            self.close()
+            self.parallel = False
+            return {spec.name: self.render(spec, output_dir) for spec in specs}
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
@@ -0,0 +1,231 @@
+import ast
+import dataclasses
+import functools
+import hashlib
+import importlib.util
+import os
+import pickle
+
+import pandas as pd
+
+from core.charts import DEFAULT_OUTPUT_DIR, ChartResult
+from core.llm_cache import DEFAULT_CACHE_DIR
+
+# Bump to invalidate every stored checkpoint after a format change.
+CHECKPOINT_FORMAT = 1
+SIMPLE_TYPES = (str, int, float, bool, type(None))
+# Packages whose source is part of an agent's fingerprint when it imports them.
+PROJECT_PACKAGES = ("core", "agents")
+
+
+def frame_hash(df):
+    """Content hash of a DataFrame: values, index, column names and dtypes."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(repr(list(df.columns)).encode("utf-8"))
+    h.update(repr([str(t) for t in df.dtypes]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _project_imports(module_name):
+    """`module_name` plus every project module it imports, directly or transitively."""
+    found, pending = set(), [module_name]
+    while pending:
+        name = pending.pop()
+        if name in found:
+            continue
+        spec = importlib.util.find_spec(name)
+        if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+            continue
+        found.add(name)
+        with open(spec.origin, "rb") as f:
+            tree = ast.parse(f.read())
+        package = name if spec.submodule_search_locations else name.rpartition(".")[0]
+        # Imports anywhere in the file, including the lazy ones inside functions.
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                targets = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                base = importlib.util.resolve_name("." * node.level + (node.module or ""), package) \
+                    if node.level else node.module
+                # `from core import x` may name a submodule.
+                targets = [base] + [f"{base}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            for target in targets:
+                if target.split(".")[0] in PROJECT_PACKAGES:
+                    try:
+                        if importlib.util.find_spec(target) is not None:
+                            pending.append(target)
+                    except (ImportError, ValueError):
+                        pass
+    return found
+
+
+@functools.lru_cache(maxsize=None)
+def _source_hash(module_name):
+    """Hash of a module's source and the source of every project module it uses."""
+    h = hashlib.blake2b(digest_size=12)
+    try:
+        for name in sorted(_project_imports(module_name)):
+            with open(importlib.util.find_spec(name).origin, "rb") as f:
+                h.update(name.encode("utf-8") + b"\0" + f.read())
+    except (OSError, SyntaxError, ImportError, ValueError):
+        return ""
+    return h.hexdigest()
+
+
+def agent_fingerprint(agent):
+    """
+    What identifies an agent's behaviour: its class, the source of its
+    module and of the project modules it imports (so an edit to, say,
+    core.encoding invalidates DataAgent's checkpoints), its `version`,
+    scalar settings, and the `fingerprint()` of collaborators such as the
+    LLM gateway or chart renderer.
+    """
+    parts = [type(agent).__module__, type(agent).__qualname__, str(getattr(agent, "version", "")), _source_hash(type(agent).__module__)]
+    for name, value in sorted(vars(agent).items()):
+        if isinstance(value, SIMPLE_TYPES) or (
+            isinstance(value, tuple) and all(isinstance(v, SIMPLE_TYPES) for v in value)
+        ):
+            parts.append(f"{name}={value!r}")
+        elif callable(getattr(value, "fingerprint", None)):
+            parts.append(f"{name}={value.fingerprint()}")
+    return "|".join(parts)
+
+
+def stage_keys(stages, data_key):
+    """
+    Content-addressed key per stage, by stage index: the hash of the input
+    data, the agent's fingerprint and the keys of the stages it depends on.
+    A change anywhere upstream therefore changes every key downstream.
+    """
+    keys = {}
+    for stage in stages:
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f"{CHECKPOINT_FORMAT}|{data_key}|{agent_fingerprint(stage.agent)}".encode("utf-8"))
+        for dep in sorted(stage.deps):
+            h.update(keys[dep].encode("ascii"))
+        keys[stage.index] = h.hexdigest()
+    return keys
+
+
+class CheckpointStore:
+    """
+    Per-stage context outputs pickled under `directory`, one file per key.
+
+    Besides the context values, files the stage wrote (report, charts) are
+    archived as bytes, so a restore recreates them even if `outputs/` was
+    cleaned in between. Least recently used checkpoints are deleted once
+    the directory grows past `max_bytes`.
+    """
+
+    def __init__(self, directory=None, max_bytes=2 * 1024 ** 3, enabled=True):
+        self.directory = directory or os.path.join(DEFAULT_CACHE_DIR, "checkpoints")
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def load(self, key):
+        """The stored {"values", "shared", "files"} payload for `key`, or None."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                payload = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        os.utime(path)
+        return payload
+
+    def save(self, key, values, shared=None, artifacts=()):
+        """
+        Persist a stage's outputs: `values` are the keys it wrote, `shared`
+        the entries it added to shared dict keys, and `artifacts` the keys
+        among `values` that hold paths of files it wrote. Unpicklable
+        outputs simply aren't checkpointed.
+        """
+        if not self.enabled:
+            return False
+        files = {}
+        for name in artifacts:
+            path = values.get(name)
+            if isinstance(path, str) and os.path.isfile(path):
+                with open(path, "rb") as f:
+                    files[path] = f.read()
+        payload = {"values": values, "shared": shared or {}, "files": files}
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, path)
+        self.evict()
+        return True
+
+    def evict(self):
+        if not os.path.isdir(self.directory):
+            return
+        entries = []
+        total = 0
+        for fname in os.listdir(self.directory):
+            if not fname.endswith(".pkl"):
+                continue
+            path = os.path.join(self.directory, fname)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:  # evicted by another process
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def _relocate(path, output_dir):
+    return os.path.join(output_dir, os.path.basename(path))
+
+
+def restore(payload, context):
+    """
+    Put a checkpoint back into `context` and rewrite its files into this
+    run's `output_dir` (so a run never points at another run's outputs).
+    Entries of shared dict keys are only added where absent, so a sibling
+    stage that ran for real in the meantime is never overwritten with
+    stale output.
+    """
+    output_dir = context.get("output_dir") or DEFAULT_OUTPUT_DIR
+    values = dict(payload["values"])
+    for name, value in values.items():
+        if isinstance(value, str) and value in payload["files"]:
+            values[name] = _relocate(value, output_dir)
+    for path, data in payload["files"].items():
+        path = _relocate(path, output_dir)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    context.update(values)
+    for key, entries in payload["shared"].items():
+        target = context.setdefault(key, {})
+        for name, value in entries.items():
+            if name in target:
+                continue
+            if isinstance(value, ChartResult) and value.path:
+                value = dataclasses.replace(value, path=_relocate(value.path, output_dir))
+                os.makedirs(os.path.dirname(value.path) or ".", exist_ok=True)
+                with open(value.path, "wb") as f:
+                    f.write(value.data)
+            target[name] = value
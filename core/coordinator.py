@@ -1,3 +1,6 @@
+import os
+import time
+
 from agents.data_agent import DataAgent
 from agents.target_agent import TargetAgent
 from agents.feature_agent import FeatureAgent
@@ -5,23 +8,143 @@ from agents.model_agent import ModelAgent
 from agents.evaluation_agent import EvaluationAgent
 from agents.insight_agent import InsightAgent
 from agents.report_agent import ReportAgent
+from core.charts import ChartRenderer
+from core.checkpoint import CheckpointStore, frame_hash, restore, stage_keys
+from core.llm_gateway import LLMGateway
+from core.scheduler import PipelineCancelled, build_dag, critical_path, run_dag
+from core.tracing import Tracer
+
+# Keys several agents add entries to rather than overwrite.
+SHARED_KEYS = ("charts",)
+
+CHECKPOINTS_ENABLED = os.getenv("INSIGHTSPHERE_CHECKPOINTS", "on").lower() not in ("0", "off", "false")
+
 
 class PipelineCoordinator:
     """Runs the full multi-agent AutoDS pipeline."""
 
-    def __init__(self):
+    def __init__(self, gateway=None, renderer=None, parallel=True, tracer=None, trace_appendix=False,
+                 checkpoints=None, model_jobs=None):
+        # One gateway is shared so the concurrency cap spans every LLM agent.
+        self.gateway = gateway or LLMGateway()
+        # Likewise one chart renderer, so every agent draws on the same worker pool.
+        self.renderer = renderer or ChartRenderer()
         self.pipeline = [
             DataAgent(),
-            TargetAgent(),
-            FeatureAgent(),
-            ModelAgent(),
-            EvaluationAgent(),
-            InsightAgent(),
-            ReportAgent(),
+            TargetAgent(self.gateway),
+            FeatureAgent(self.renderer),
+            # model_jobs caps training cores, e.g. when several pipelines share a machine.
+            ModelAgent(n_jobs=model_jobs, renderer=self.renderer),
+            EvaluationAgent(self.renderer),
+            InsightAgent(self.gateway),
+            ReportAgent(trace_appendix=trace_appendix),
         ]
 
-    def run(self, df):
-        context = {"data": df}
-        for agent in self.pipeline:
-            context = agent.run(context)
+        # Validated up front: a missing or doubly-written key fails here, not mid-run.
+        self.stages = build_dag(
+            self.pipeline, initial_keys=("data", "run_trace", "output_dir", "source_profile") + SHARED_KEYS, shared_keys=SHARED_KEYS
+        )
+        self.parallel = parallel
+        self.tracer = tracer or Tracer()
+        # Stage outputs are reused across runs when nothing upstream changed.
+        if checkpoints is None:
+            checkpoints = CheckpointStore(enabled=CHECKPOINTS_ENABLED)
+        self.checkpoints = checkpoints or None
+
+    def log(self, msg):
+        print(f"[PipelineCoordinator] {msg}")
+
+    def _run_stage(self, stage, context, key, progress=None):
+        """Run one stage, reporting "started" and "finished"/"restored"/"failed" to `progress`."""
+        if progress is None:
+            return self._run_or_restore(stage, context, key)[0]
+        start = time.perf_counter()
+        progress("started", stage.name, 0.0)
+        try:
+            context, restored = self._run_or_restore(stage, context, key)
+        except BaseException:
+            progress("failed", stage.name, time.perf_counter() - start)
+            raise
+        progress("restored" if restored else "finished", stage.name, time.perf_counter() - start)
+        return context
+
+    def _run_or_restore(self, stage, context, key):
+        """Restore the stage from its checkpoint, or run it and save one."""
+        agent = stage.agent
+        payload = self.checkpoints.load(key) if self.checkpoints and stage.declared else None
+        if payload is not None:
+            restore(payload, context)
+            agent.log("Unchanged inputs; restored from checkpoint.")
+            return context, True
+
+        shared_before = {k: set(context.get(k, {})) for k in SHARED_KEYS}
+        context = agent.run(context)
+        if self.checkpoints and stage.declared and agent.checkpointable(context):
+            values = {k: context[k] for k in agent.writes if k in context and k not in SHARED_KEYS}
+            # Entries siblings add concurrently may be captured too; restore never overwrites them.
+            shared = {
+                k: {n: v for n, v in context.get(k, {}).items() if n not in shared_before[k]}
+                for k in SHARED_KEYS if k in agent.writes
+            }
+            self.checkpoints.save(key, values, shared, agent.artifacts)
+        return context, False
+
+    def run(self, df, data_key=None, output_dir=None, progress=None, cancel=None, source_profile=None):
+        """
+        Run the pipeline on `df`. `data_key` is an optional precomputed
+        content hash of it (e.g. of the uploaded file); otherwise the frame
+        is hashed when checkpoints are on.
+
+        output_dir: where charts and the report go (default `outputs/`), so
+                    concurrent runs don't overwrite each other's files.
+        progress:   called as progress(event, agent_name, elapsed_seconds)
+                    when each agent starts and ends.
+        cancel:     a threading.Event; once set, no further agent starts and
+                    PipelineCancelled is raised.
+        source_profile: DataProfile of the whole dataset when `df` is a
+                    sample of it (IngestResult.profile); the cleaner imputes
+                    and the report summarises from it.
+        """
+        keys = {}
+        if self.checkpoints:
+            if not data_key:
+                data_key = frame_hash(df)
+                if source_profile is not None:
+                    data_key += frame_hash(source_profile.table.astype({"top": str}))
+            keys = stage_keys(self.stages, data_key)
+
+        trace = self.tracer.start_run()
+        context = {"data": df, "run_trace": trace}
+        if output_dir:
+            context["output_dir"] = output_dir
+        if source_profile is not None:
+            context["source_profile"] = source_profile
+        for key in SHARED_KEYS:
+            context[key] = {}
+        # Independent agents run side by side: FeatureAgent alongside
+        # ModelAgent and EvaluationAgent. InsightAgent reads the evaluation
+        # outputs, so it waits for both. Per-stage profiles are only
+        # meaningful one stage at a time.
+        serial = not self.parallel or self.tracer.profile_dir
+        try:
+            timings = run_dag(
+                self.stages,
+                context,
+                max_workers=1 if serial else None,
+                trace=trace,
+                run_stage=lambda stage, ctx: self._run_stage(stage, ctx, keys.get(stage.index), progress),
+                cancel=cancel,
+            )
+        except PipelineCancelled:
+            trace.finish(status="cancelled")
+            raise
+        except BaseException as e:
+            trace.finish(status="error", error=f"{type(e).__name__}: {e}")
+            raise
+
+        path, seconds = critical_path(self.stages, timings)
+        context["stage_timings"] = {s.name: round(timings.get(s.index, 0.0), 3) for s in self.stages}
+        context["critical_path"] = {"stages": path, "seconds": round(seconds, 3)}
+        context["run_summary"] = trace.finish(critical_path=context["critical_path"])
+        self.log(f"Critical path ({seconds:.2f}s): {' → '.join(path)}")
         return context
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+# Numeric blocks larger than this are correlated chunk by chunk instead of
+# being copied into one float64 matrix.
+STREAMING_CORR_BYTES = 256 * 1024 * 1024
+DEFAULT_CORR_CHUNK_ROWS = 50_000
+
+
+def _as_float(frame):
+    return frame.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def target_correlations(X, y):
+    """
+    Pearson correlation of every column of `X` with `y`, in one
+    matrix-vector pass over the centred columns instead of a full p x p
+    `DataFrame.corr()`.
+
+    Matches `df.corr()[target]`: rows where either side is missing are
+    left out pair by pair, and constant columns give NaN.
+    Returns a Series indexed like `X.columns`.
+    """
+    values = _as_float(X)
+    target = np.asarray(y, dtype="float64")
+    if np.isnan(values).any() or np.isnan(target).any():
+        acc = CorrelationAccumulator(X.columns)
+        acc.update(values, target)
+        return acc.result()
+
+    n = len(target)
+    if n < 2:
+        return pd.Series(np.nan, index=X.columns)
+    values = values - values.mean(axis=0)
+    target = target - target.mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt((values * values).sum(axis=0))
+        corr = (target @ values) / (std * np.sqrt(target @ target))
+    corr[std == 0] = np.nan
+    return pd.Series(np.clip(corr, -1.0, 1.0), index=X.columns)
+
+
+class CorrelationAccumulator:
+    """
+    Streaming target-vs-all Pearson correlation.
+
+    Feed row chunks with `update(values, y)`; only per-column sums are kept,
+    so memory is O(columns) however many rows go through. Sums are taken
+    around the first chunk's means to avoid the cancellation a raw
+    sum-of-squares formula suffers from on large-valued columns.
+    """
+
+    def __init__(self, columns):
+        self.columns = pd.Index(columns)
+        p = len(self.columns)
+        self.shift_x = None
+        self.shift_y = None
+        self.n = np.zeros(p)
+        self.sx = np.zeros(p)
+        self.sy = np.zeros(p)
+        self.sxx = np.zeros(p)
+        self.syy = np.zeros(p)
+        self.sxy = np.zeros(p)
+
+    def update(self, values, y):
+        values = np.asarray(values, dtype="float64")
+        y = np.asarray(y, dtype="float64")
+        if self.shift_x is None:
+            with np.errstate(invalid="ignore"):
+                self.shift_x = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) else np.zeros(values.shape[1])
+                self.shift_y = float(np.nan_to_num(np.nanmean(y))) if len(y) else 0.0
+
+        # Pairwise-complete: a row counts for column j only if x_j and y are both present.
+        valid = ~np.isnan(values) & ~np.isnan(y)[:, None]
+        x = np.where(valid, values - self.shift_x, 0.0)
+        yc = np.where(np.isnan(y), 0.0, y - self.shift_y)
+        w = valid.astype("float64")
+
+        self.n += w.sum(axis=0)
+        self.sx += x.sum(axis=0)
+        self.sy += yc @ w
+        self.sxx += (x * x).sum(axis=0)
+        self.syy += (yc * yc) @ w
+        self.sxy += yc @ x
+        return self
+
+    def result(self):
+        n = self.n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = self.sxy - self.sx * self.sy / n
+            var_x = self.sxx - self.sx ** 2 / n
+            var_y = self.syy - self.sy ** 2 / n
+            corr = cov / np.sqrt(var_x * var_y)
+        # Guard constant columns against rounding noise in the variance.
+        tiny = 1e-12 * np.maximum(self.sxx, 1e-300)
+        corr[(n < 2) | (var_x <= tiny) | (var_y <= 1e-12 * np.maximum(self.syy, 1e-300))] = np.nan
+        return pd.Series(np.clip(corr, -1.0, 1.0), index=self.columns)
+
+
+def target_correlations_chunked(df, target, columns=None, chunk_rows=DEFAULT_CORR_CHUNK_ROWS):
+    """
+    `target_correlations` for frames too large to copy into one float
+    matrix: rows are converted and accumulated `chunk_rows` at a time.
+    """
+    columns = [c for c in (columns if columns is not None else df.columns) if c != target]
+    acc = CorrelationAccumulator(columns)
+    for start in range(0, len(df), chunk_rows):
+        block = df.iloc[start:start + chunk_rows]
+        acc.update(_as_float(block[columns]), _as_float(block[[target]])[:, 0])
+    return acc.result()
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# Columns with at most this many distinct values are one-hot encoded.
+MAX_ONEHOT_CARDINALITY = 50
+# Columns where (almost) every row is distinct are identifiers: dropped.
+ID_LIKE_RATIO = 0.95
+ID_LIKE_MIN_ROWS = 50
+# Below this share of non-zeros the model matrix is kept sparse.
+SPARSE_DENSITY = 0.3
+
+
+def _codes(series):
+    """Sorted integer codes and categories, matching pd.get_dummies' column order."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    codes, uniques = pd.factorize(series, sort=True)
+    return codes, uniques
+
+
+def onehot_sparse(series, drop_first=True):
+    """
+    One-hot encode a column straight into a CSR matrix.
+
+    Returns (matrix, column names); names follow pd.get_dummies' `<col>_<value>`.
+    """
+    codes, categories = _codes(series)
+    start = 1 if drop_first else 0
+    n_out = max(len(categories) - start, 0)
+    rows = np.flatnonzero(codes >= start)
+    matrix = sp.csr_matrix(
+        (np.ones(len(rows), dtype=bool), (rows, codes[rows] - start)),
+        shape=(len(series), n_out),
+    )
+    names = [f"{series.name}_{c}" for c in categories[start:]]
+    return matrix, names
+
+
+def encode_categoricals(df, max_onehot=MAX_ONEHOT_CARDINALITY, id_ratio=ID_LIKE_RATIO):
+    """
+    Cardinality-aware replacement for `pd.get_dummies(df, columns=cat_cols, drop_first=True)`.
+
+    - low cardinality (<= max_onehot values): one-hot, stored as sparse
+      boolean columns so wide encodings cost memory only for the ones;
+    - identifier-like (distinct on >= id_ratio of rows): dropped;
+    - everything in between: frequency encoded as `<col>__freq`, the share
+      of rows holding the same value.
+
+    Target encoding isn't an option here because the target is only chosen
+    after cleaning. Returns (encoded frame, plan dict of column lists).
+    """
+    cat_cols = df.select_dtypes(include=["object", "category"]).columns
+    plan = {"onehot": [], "frequency": [], "dropped": []}
+    if not len(cat_cols):
+        return df, plan
+
+    n = len(df)
+    blocks, names = [], []
+    freq = {}
+    for col in cat_cols:
+        s = df[col]
+        k = s.nunique(dropna=True)
+        if k <= max_onehot:
+            matrix, cols = onehot_sparse(s)
+            blocks.append(matrix)
+            names.extend(cols)
+            plan["onehot"].append(col)
+        elif n >= ID_LIKE_MIN_ROWS and k >= id_ratio * n:
+            plan["dropped"].append(col)
+        else:
+            counts = s.map(s.value_counts(normalize=True))
+            freq[f"{col}__freq"] = counts.astype("float64").to_numpy()
+            plan["frequency"].append(col)
+
+    out = df.drop(columns=cat_cols)
+    parts = [out]
+    if freq:
+        parts.append(pd.DataFrame(freq, index=df.index))
+    if blocks:
+        dummies = pd.DataFrame.sparse.from_spmatrix(sp.hstack(blocks, format="csc"), index=df.index, columns=names)
+        parts.append(dummies)
+    return pd.concat(parts, axis=1) if len(parts) > 1 else out, plan
+
+
+def is_sparse_column(series):
+    return isinstance(series.dtype, pd.SparseDtype)
+
+
+def dense_series(series):
+    return series.sparse.to_dense() if is_sparse_column(series) else series
+
+
+def to_model_matrix(X):
+    """
+    Features for scikit-learn. Frames with sparse columns become a CSR matrix
+    without densifying them, unless the whole matrix is dense enough that a
+    regular array is smaller. Returns (matrix, feature names).
+    """
+    names = list(X.columns)
+    sparse_mask = np.array([is_sparse_column(X[c]) for c in X.columns], dtype=bool)
+    if not sparse_mask.any():
+        return X, names
+
+    sparse_part = X.loc[:, sparse_mask]
+    dense_part = X.loc[:, ~sparse_mask]
+    sparse_nnz = sum(sparse_part[c].sparse.npoints for c in sparse_part.columns)
+    density = (sparse_nnz + dense_part.size) / max(X.size, 1)
+    if density >= SPARSE_DENSITY:
+        return X.astype({c: X[c].dtype.subtype for c in sparse_part.columns}), names
+
+    matrices = []
+    if len(dense_part.columns):
+        matrices.append(sp.csr_matrix(dense_part.to_numpy(dtype="float64")))
+    matrices.append(sparse_part.astype(pd.SparseDtype("float64", 0.0)).sparse.to_coo())
+    matrix = sp.hstack(matrices, format="csr")
+    return matrix, list(dense_part.columns) + list(sparse_part.columns)
@@ -0,0 +1,979 @@
+import collections
+import contextlib
+import io
+import json
+import os
+import pathlib
+import shutil
+import sqlite3
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from core.profile import BLANKS, DataProfile, profile_frame
+from core.sketches import SketchProfiler
+
+# Memory the parsed dataset may occupy before ingestion falls back to sampling.
+DEFAULT_MEMORY_BUDGET_MB = float(os.getenv("INSIGHTSPHERE_MEMORY_BUDGET_MB", "1024"))
+DEFAULT_CHUNK_ROWS = 100_000
+# Profile every row with mergeable sketches when ingestion has to sample.
+STREAM_STATS = os.getenv("INSIGHTSPHERE_STREAM_STATS", "on").lower() not in ("0", "off", "false")
+
+# Text columns with at most this share of distinct values become categoricals,
+# unless they look numeric (DataAgent coerces those itself).
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+NUMERIC_LIKE_RATIO = 0.7
+
+
+@dataclass
+class IngestResult:
+    """A parsed upload plus what ingestion had to do to fit it in memory."""
+
+    df: pd.DataFrame
+    rows_seen: int
+    sampled: bool = False
+    notice: Optional[str] = None
+    # Statistics of all `rows_seen` rows when `df` is a sample (a DataProfile).
+    profile: Optional[DataProfile] = None
+
+
+def _is_text(series):
+    return series.dtype == object or pd.api.types.is_string_dtype(series)
+
+
+def infer_dtype_plan(frame):
+    """
+    Decide per-column downcasts from a representative chunk.
+
+    Floats become float32, integers are shrunk to the smallest type that fits
+    each chunk, and repetitive text columns become categoricals.
+    """
+    plan = {}
+    for col in frame.columns:
+        s = frame[col]
+        if pd.api.types.is_bool_dtype(s):
+            continue
+        if pd.api.types.is_float_dtype(s):
+            plan[col] = "float32"
+        elif pd.api.types.is_integer_dtype(s):
+            plan[col] = "integer"
+        elif _is_text(s):
+            non_null = s.notna().sum()
+            if non_null == 0:
+                continue
+            if pd.to_numeric(s, errors="coerce").notna().sum() >= NUMERIC_LIKE_RATIO * non_null:
+                continue
+            if s.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * non_null:
+                plan[col] = "category"
+    return plan
+
+
+def apply_dtype_plan(frame, plan):
+    for col, kind in plan.items():
+        if col not in frame.columns:
+            continue
+        s = frame[col]
+        try:
+            if kind == "float32":
+                if pd.api.types.is_numeric_dtype(s):
+                    frame[col] = s.astype("float32")
+            elif kind == "integer":
+                if pd.api.types.is_integer_dtype(s):
+                    frame[col] = pd.to_numeric(s, downcast="integer")
+            elif kind == "category":
+                frame[col] = s.astype("category")
+        except (TypeError, ValueError):
+            # A later chunk that doesn't match the plan keeps its parsed dtype.
+            pass
+    return frame
+
+
+def concat_frames(frames):
+    """pd.concat that keeps categorical columns categorical across chunks."""
+    frames = [f for f in frames if f is not None]
+    if len(frames) == 1:
+        return frames[0]
+    cat_cols = [
+        c for c in frames[0].columns
+        if all(isinstance(f[c].dtype, pd.CategoricalDtype) for f in frames if c in f.columns)
+    ]
+    for col in cat_cols:
+        cats = pd.Index([])
+        for f in frames:
+            cats = cats.union(f[col].cat.categories)
+        for f in frames:
+            f[col] = f[col].cat.set_categories(cats)
+    return pd.concat(frames, ignore_index=False)
+
+
+def _bytes_per_row(frame):
+    if len(frame) == 0:
+        return 1.0
+    return max(frame.memory_usage(deep=True).sum() / len(frame), 1.0)
+
+
+def _sample_notice(budget, kept, total, requested=False):
+    if requested:
+        return f"Analysing a uniform random sample of {kept:,} of {total:,} rows."
+    return (
+        f"⚠ The file is larger than the {budget / 1024 / 1024:g} MB memory budget: "
+        f"analysing a uniform random sample of {kept:,} of {total:,} rows."
+    )
+
+
+def _overwrite(reservoir, slots, rows):
+    """
+    Write `rows` over the reservoir rows at positions `slots`, one column at
+    a time and in place, so the sample never exists twice in memory. A
+    column's dtype is only widened (as concatenation would) when the new
+    values need it.
+    """
+    for col in rows.columns.difference(reservoir.columns, sort=False):
+        reservoir[col] = rows[col].iloc[:0].reindex(range(len(reservoir)))
+    for j, col in enumerate(reservoir.columns):
+        dtype = reservoir[col].dtype
+        if col in rows.columns:
+            values = rows[col]
+        elif dtype.kind in "biu":
+            # A column these rows lack: missing values need a float (or object) column.
+            values = pd.Series(np.nan, index=rows.index)
+        else:
+            values = pd.Series(None, index=rows.index, dtype=dtype)
+        if isinstance(dtype, pd.CategoricalDtype) and isinstance(values.dtype, pd.CategoricalDtype):
+            new = values.cat.categories.difference(dtype.categories)
+            if len(new):
+                reservoir[col] = reservoir[col].cat.add_categories(new)
+                dtype = reservoir[col].dtype
+            values = values.cat.set_categories(dtype.categories)
+        elif values.dtype != dtype:
+            common = pd.concat([reservoir[col].iloc[:0], values.iloc[:0]]).dtype
+            if common != dtype:
+                reservoir[col] = reservoir[col].astype(common)
+            values = values.astype(common)
+        reservoir.iloc[slots, j] = values.array
+
+
+def ingest_chunks(chunks, memory_budget_mb=None, on_first_chunk=None, seed=42, stream_stats=None, max_rows=None):
+    """
+    Assemble an iterable of DataFrame chunks into one frame within a memory budget.
+
+    The dtype plan is inferred from the first chunk and applied to every
+    chunk; `on_first_chunk` is called with that first (downcast) chunk so a
+    preview can be shown before the rest of the file is read. When the rows
+    would exceed `memory_budget_mb`, ingestion switches to a uniform
+    reservoir sample (Algorithm R) sized to the budget and, with
+    `stream_stats`, sketches every row on the way so the result's
+    `profile` describes the whole file rather than the sample. `max_rows`
+    caps the sample size below what the budget allows.
+    """
+    budget = (memory_budget_mb or DEFAULT_MEMORY_BUDGET_MB) * 1024 * 1024
+    rng = np.random.default_rng(seed)
+    stream_stats = STREAM_STATS if stream_stats is None else stream_stats
+
+    plan = None
+    capacity = None
+    kept = []
+    reservoir = None
+    profiler = None
+    seen = 0
+
+    for chunk in chunks:
+        if plan is None:
+            plan = infer_dtype_plan(chunk)
+            chunk = apply_dtype_plan(chunk, plan)
+            capacity = max(int(budget // _bytes_per_row(chunk)), 1)
+            requested = max_rows is not None and max_rows < capacity
+            if requested:
+                capacity = max(max_rows, 1)
+            if on_first_chunk is not None:
+                on_first_chunk(chunk)
+        else:
+            chunk = apply_dtype_plan(chunk, plan)
+
+        chunk = chunk.reset_index(drop=True)
+        n = len(chunk)
+
+        if reservoir is None:
+            room = capacity - seen
+            if n <= room:
+                kept.append(chunk)
+                seen += n
+                continue
+            # Reservoir is full from here on: its slots are the index 0..capacity-1.
+            kept.append(chunk.iloc[:room])
+            reservoir = concat_frames(kept).reset_index(drop=True)
+            kept = []
+            chunk = chunk.iloc[room:].reset_index(drop=True)
+            seen += room
+            n = len(chunk)
+            if stream_stats:
+                # Everything read so far is in the reservoir at this point.
+                profiler = SketchProfiler(seed=seed).update(reservoir)
+
+        if profiler is not None:
+            profiler.update(chunk)
+
+        # Row t (0-based, global) replaces a random slot with probability capacity / (t + 1).
+        positions = np.arange(seen, seen + n)
+        slots = rng.integers(0, positions + 1)
+        accepted = slots < capacity
+        seen += n
+        if not accepted.any():
+            continue
+        slots = slots[accepted]
+        # When a slot is drawn twice in a chunk, the later row wins.
+        last = len(slots) - 1 - np.unique(slots[::-1], return_index=True)[1]
+        _overwrite(reservoir, slots[last], chunk.iloc[np.flatnonzero(accepted)[last]])
+
+    if plan is None:
+        return IngestResult(pd.DataFrame(), 0)
+
+    if reservoir is None:
+        return IngestResult(concat_frames(kept).reset_index(drop=True), seen)
+
+    df = reservoir
+    profile = profiler.profile() if profiler is not None else None
+    notice = _sample_notice(budget, len(df), seen, requested)
+    return IngestResult(df, seen, sampled=True, notice=notice, profile=profile)
+
+
+def fit_to_budget(df, memory_budget_mb=None, seed=42, stream_stats=None):
+    """
+    Downcast and, if still over budget, sample an already materialized
+    frame. The frame is in memory anyway, so the profile of all its rows
+    is exact.
+    """
+    plan = infer_dtype_plan(df)
+    df = apply_dtype_plan(df, plan)
+    budget = (memory_budget_mb or DEFAULT_MEMORY_BUDGET_MB) * 1024 * 1024
+    capacity = max(int(budget // _bytes_per_row(df)), 1)
+    if len(df) <= capacity:
+        return IngestResult(df, len(df))
+    profile = None
+    if STREAM_STATS if stream_stats is None else stream_stats:
+        profile = profile_frame(df)
+        profile.text = None
+    sample = df.sample(n=capacity, random_state=seed).sort_index().reset_index(drop=True)
+    return IngestResult(
+        sample, len(df), sampled=True, notice=_sample_notice(budget, len(sample), len(df)), profile=profile
+    )
+
+
+def read_csv_chunked(source, memory_budget_mb=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+                     on_first_chunk=None, **read_kwargs):
+    """Stream a delimited file through `ingest_chunks` instead of one `pd.read_csv` call."""
+    reader = pd.read_csv(source, chunksize=chunk_rows, **read_kwargs)
+    with reader:
+        return ingest_chunks(reader, memory_budget_mb, on_first_chunk)
+
+
+def read_parquet_chunked(source, memory_budget_mb=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+                         on_first_chunk=None):
+    """Stream a Parquet file batch by batch through `ingest_chunks`."""
+    import pyarrow.parquet as pq
+
+    batches = pq.ParquetFile(source).iter_batches(batch_size=chunk_rows)
+    chunks = (batch.to_pandas() for batch in batches)
+    return ingest_chunks(chunks, memory_budget_mb, on_first_chunk)
+
+
+# ---------------------------------------------------------------------------
+# XML and JSON lines
+# ---------------------------------------------------------------------------
+
+# Children of the root read to decide which tag marks an XML row.
+XML_ROW_PROBE = 50
+# Newline-delimited JSON is parsed a block of whole lines of about this size at a time.
+JSON_BLOCK_BYTES = 16 * 1024 * 1024
+# Bytes a .json file's first line may take for it to be recognised as JSON lines.
+JSON_SNIFF_BYTES = 1024 * 1024
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+
+
+@contextlib.contextmanager
+def _open_binary(source):
+    """A binary file for a path; file objects are passed through (and left open)."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield f
+    else:
+        yield source
+
+
+def _xml_child_tags(source):
+    """Tags of the root's first XML_ROW_PROBE children, counted."""
+    from lxml import etree
+
+    tags = collections.Counter()
+    with _open_binary(source) as f:
+        start = f.tell()
+        depth = 0
+        try:
+            for event, elem in etree.iterparse(f, events=("start", "end"), resolve_entities=False, no_network=True):
+                if event == "end":
+                    depth -= 1
+                    continue
+                depth += 1
+                if depth == 2:
+                    tags[elem.tag] += 1
+                    if sum(tags.values()) == XML_ROW_PROBE:
+                        break
+        except etree.XMLSyntaxError:
+            pass
+        finally:
+            f.seek(start)
+    return tags
+
+
+def _xml_frame(columns, rows):
+    """A chunk of `rows` rows from per-column value lists, padding the rows after a column's last value."""
+    for values in columns.values():
+        values.extend([None] * (rows - len(values)))
+    return pd.DataFrame(columns, index=pd.RangeIndex(rows))
+
+
+def xml_chunks(source, chunk_rows=DEFAULT_CHUNK_ROWS, skipped=None):
+    """
+    An XML document as DataFrame chunks: the root's children carrying the
+    most common tag among its first XML_ROW_PROBE children are the rows
+    (every child is, when no tag repeats), and their children's tags and
+    texts are the columns (a repeated tag keeps its last text). Children
+    with another tag, such as a leading <meta>, are counted by tag in the
+    `skipped` Counter. lxml's iterparse filters row elements in C and hands
+    over one finished row at a time, whose values go straight into per-column
+    lists and which is then cleared and detached, so memory holds one chunk
+    of values rather than the whole tree.
+    """
+    from lxml import etree
+
+    tags = _xml_child_tags(source)
+    if not tags:
+        return
+    tag, count = tags.most_common(1)[0]
+    if count == 1 and len(tags) > 1:
+        tag = None
+    # One list of values per column tag, None where a row lacks the tag.
+    columns, rows = {}, 0
+    root = None
+    events = etree.iterparse(
+        source, events=("end",), tag=tag, huge_tree=True, resolve_entities=False, no_network=True,
+        remove_comments=True, remove_pis=True,
+    )
+    for _, elem in events:
+        parent = elem.getparent()
+        if parent is None or parent.getparent() is not None:
+            continue  # the root, or an element nested inside a row
+        root = parent
+        for field in elem:
+            values = columns.get(field.tag)
+            if values is None:
+                values = columns[field.tag] = []
+            if len(values) > rows:
+                values[rows] = field.text
+            else:
+                values.extend([None] * (rows - len(values)))  # rows that lacked the tag
+                values.append(field.text)
+        rows += 1
+        elem.clear()
+        while elem.getprevious() is not None:
+            if skipped is not None and tag is not None and parent[0].tag != tag:
+                skipped[parent[0].tag] += 1
+            del parent[0]
+        if rows == chunk_rows:
+            yield _xml_frame(columns, rows)
+            columns, rows = {}, 0
+    if rows:
+        yield _xml_frame(columns, rows)
+    if skipped is not None and tag is not None and root is not None:
+        # Elements after the last row.
+        skipped.update(child.tag for child in root if child.tag != tag)
+
+
+def is_json_lines(source):
+    """
+    Whether a .json file is really newline-delimited JSON: its first line
+    is a complete object on its own and more lines follow. File objects are
+    rewound afterwards.
+    """
+    with _open_binary(source) as f:
+        start = f.tell()
+        head = f.read(JSON_SNIFF_BYTES)
+        f.seek(start)
+    first, _, rest = head.lstrip().partition(b"\n")
+    if not rest.strip():
+        return False
+    try:
+        return isinstance(json.loads(first), dict)
+    except ValueError:
+        return False
+
+
+def _parse_json_block(block):
+    """
+    One block of JSON lines as a frame. Nested objects become dotted
+    columns ("a.b") and arrays are kept as JSON text, so every cell is a
+    scalar the rest of the pipeline can hash and encode.
+    """
+    import pyarrow as pa
+    import pyarrow.json as pj
+
+    try:
+        table = pj.read_json(io.BytesIO(block))
+        while any(pa.types.is_struct(field.type) for field in table.schema):
+            table = table.flatten()
+        frame = table.to_pandas()
+    except pa.ArrowInvalid:
+        # e.g. a field whose type changes within the block.
+        frame = pd.json_normalize([json.loads(line) for line in block.splitlines() if line.strip()])
+    for col in frame.columns[frame.dtypes == object]:
+        values = frame[col]
+        nested = values.map(lambda v: isinstance(v, (list, dict, np.ndarray)))
+        if nested.any():
+            frame[col] = values.where(~nested, values[nested].map(
+                lambda v: json.dumps(v.tolist() if isinstance(v, np.ndarray) else v, default=str)
+            ))
+    return frame
+
+
+def json_lines_chunks(source, block_bytes=JSON_BLOCK_BYTES):
+    """
+    Newline-delimited JSON as DataFrame chunks. The file is read a block of
+    whole lines at a time and each block is parsed by Arrow's JSON reader
+    straight into columns, so neither the file nor per-row dicts are ever
+    held in full. Blocks are typed independently; pandas reconciles them
+    when the chunks are concatenated.
+    """
+    with _open_binary(source) as f:
+        rest = b""
+        while True:
+            data = f.read(block_bytes)
+            if not data:
+                break
+            data = rest + data
+            cut = data.rfind(b"\n") + 1
+            block, rest = data[:cut], data[cut:]
+            if block.strip():
+                yield _parse_json_block(block)
+        if rest.strip():
+            yield _parse_json_block(rest)
+
+
+def read_xml_chunked(source, memory_budget_mb=None, chunk_rows=DEFAULT_CHUNK_ROWS, on_first_chunk=None):
+    """Stream an XML document row by row through `ingest_chunks`."""
+    skipped = collections.Counter()
+    result = ingest_chunks(xml_chunks(source, chunk_rows, skipped), memory_budget_mb, on_first_chunk)
+    if skipped:
+        listed = ", ".join(f"<{tag}> ×{n:,}" for tag, n in skipped.most_common(5))
+        note = f"Skipped {sum(skipped.values()):,} XML elements that aren't rows: {listed}."
+        result.notice = f"{result.notice} {note}" if result.notice else note
+    return result
+
+
+def read_json_lines_chunked(source, memory_budget_mb=None, block_bytes=JSON_BLOCK_BYTES, on_first_chunk=None):
+    """Stream newline-delimited JSON block by block through `ingest_chunks`."""
+    return ingest_chunks(json_lines_chunks(source, block_bytes), memory_budget_mb, on_first_chunk)
+
+
+# ---------------------------------------------------------------------------
+# SQLite
+# ---------------------------------------------------------------------------
+
+# Rows read up front to estimate a table's in-memory size per row.
+SQLITE_PROBE_ROWS = 1000
+
+
+def _quote(identifier):
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+@contextlib.contextmanager
+def sqlite_connection(source):
+    """
+    Read-only connection to a SQLite database given as a path, or as a
+    binary file object (copied to a temporary file for the duration).
+    """
+    tmp_path = None
+    if not isinstance(source, (str, os.PathLike)):
+        fd, tmp_path = tempfile.mkstemp(suffix=".sqlite")
+        with os.fdopen(fd, "wb") as f:
+            if hasattr(source, "seek"):
+                source.seek(0)
+            shutil.copyfileobj(source, f)
+        source = tmp_path
+    conn = sqlite3.connect(f"{pathlib.Path(source).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        yield conn
+    finally:
+        conn.close()
+        if tmp_path is not None:
+            os.remove(tmp_path)
+
+
+def sqlite_tables(source):
+    """The database's tables as dicts of name, rows and columns, in schema order."""
+    with sqlite_connection(source) as conn:
+        return _sqlite_tables(conn)
+
+
+def _sqlite_tables(conn):
+    try:
+        names = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+        )]
+    except sqlite3.DatabaseError as e:
+        raise UnsupportedFormat(f"Not a readable SQLite database: {e}") from e
+    tables = []
+    for name in names:
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(name)})")]
+        rows = conn.execute(f"SELECT COUNT(*) FROM {_quote(name)}").fetchone()[0]
+        tables.append({"name": name, "rows": rows, "columns": columns})
+    return tables
+
+
+def _has_rowid(conn, table):
+    try:
+        conn.execute(f"SELECT rowid FROM {table} LIMIT 1").fetchall()
+        return True
+    except sqlite3.OperationalError:  # WITHOUT ROWID tables
+        return False
+
+
+def _sample_rowids(conn, table, total, size, seed):
+    """`size` distinct rowids drawn uniformly from the table's `total` rows, ascending."""
+    rng = np.random.default_rng(seed)
+    low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+    if high - low + 1 == total:
+        # No gaps: draw from the range without reading a single rowid.
+        return np.sort(rng.choice(total, size, replace=False)) + low
+    rowids = np.fromiter((row[0] for row in conn.execute(f"SELECT rowid FROM {table}")), dtype=np.int64, count=total)
+    return np.sort(rng.choice(rowids, size, replace=False))
+
+
+def _sqlite_profile(conn, table, sample, total):
+    """
+    DataProfile of every row of `table`, for a rowid sample that never
+    streams the rest: counts, missing values, distinct counts of
+    non-numeric columns, means, standard deviations, minima and maxima
+    come exactly from SQL aggregates, while quartiles and top values come
+    from the uniform `sample`.
+    """
+    profile = profile_frame(sample)
+    t = profile.table
+    numeric = t.index[t["kind"] == "numeric"]
+    text = t.index[t["kind"] == "text"]
+
+    def value(col):
+        c = f"t.{_quote(col)}"
+        if col in numeric:  # what the dtype plan would keep as a number
+            return f"CASE WHEN typeof({c}) IN ('integer', 'real') THEN {c} END"
+        if col in text:
+            blanks = ", ".join(f"'{b}'" for b in BLANKS)
+            return f"CASE WHEN {c} NOT IN ({blanks}) THEN {c} END"
+        return c
+
+    exprs = []
+    for col in t.index:
+        v = value(col)
+        exprs += [f"COUNT(t.{_quote(col)})", f"COUNT({v})"]
+        exprs += [f"AVG({v})", f"MIN({v})", f"MAX({v})"] if col in numeric else [f"COUNT(DISTINCT {v})"]
+    row = iter(conn.execute(f"SELECT {', '.join(exprs)} FROM {table} AS t").fetchone())
+    means = {}
+    for col in t.index:
+        non_null, present = next(row), next(row)
+        t.at[col, "null_count"] = total - (present if col in numeric else non_null)
+        t.at[col, "blank_count"] = non_null - present if col in text else 0
+        if col in numeric:
+            means[col] = next(row)
+            t.at[col, "mean"], t.at[col, "min"], t.at[col, "max"] = means[col], next(row), next(row)
+        else:
+            t.at[col, "nunique"] = next(row)
+    centred = [col for col in numeric if means[col] is not None]
+    if centred:
+        sums = conn.execute(
+            "SELECT " + ", ".join(f"SUM(({value(c)} - ?) * ({value(c)} - ?))" for c in centred) + f" FROM {table} AS t",
+            [m for c in centred for m in (means[c], means[c])],
+        ).fetchone()
+        for col, ss in zip(centred, sums):
+            n = total - t.at[col, "null_count"]
+            t.at[col, "std"] = np.sqrt(ss / (n - 1)) if n > 1 else np.nan
+
+    n = max(len(sample), 1)
+    p = t["top_count"] / n
+    t["top_count"] = (t["top_count"] * total / n).round().astype(np.int64)
+    t["missing"] = (t["null_count"] + t["blank_count"]).astype(np.int64)
+    t["count"] = total - t["missing"]
+    t["missing_share"] = t["missing"] / total if total else 0.0
+    error_bounds = {
+        # Dvoretzky-Kiefer-Wolfowitz: the sample's quartiles sit within this
+        # share of the true rank with 99% confidence.
+        "quantile_rank_error": float(np.sqrt(np.log(2 / 0.01) / (2 * n))) if len(numeric) else 0.0,
+        "nunique_relative_error": 0.0,
+        # Top counts are scaled up from the sample: 99% binomial interval.
+        "top_count_error": 2.576 * np.sqrt(p * (1 - p) / n) * total,
+    }
+    return DataProfile(t, total, profile.memory_bytes, error_bounds=error_bounds)
+
+
+def read_sqlite(source, table=None, columns=None, memory_budget_mb=None, sample_rows=None,
+                chunk_rows=DEFAULT_CHUNK_ROWS, on_first_chunk=None, seed=42):
+    """
+    Read one table of a SQLite database (the first one by default).
+
+    Only `columns` (default: all) are selected and rows stream through
+    `ingest_chunks` in chunks of `chunk_rows`. When the table would not fit
+    the memory budget, or `sample_rows` asks for fewer rows, a uniform
+    sample of rowids is drawn first and only those rows are read from the
+    file; tables without rowids fall back to streaming every row into the
+    reservoir sample.
+    """
+    with sqlite_connection(source) as conn:
+        tables = {t["name"]: t for t in _sqlite_tables(conn)}
+        if not tables:
+            raise UnsupportedFormat("The database contains no tables.")
+        if table is None:
+            table = next(iter(tables))
+        if table not in tables:
+            raise UnsupportedFormat(f"The database has no table named {table!r}.")
+        info = tables[table]
+        columns = list(columns) if columns else info["columns"]
+        unknown = [c for c in columns if c not in info["columns"]]
+        if unknown:
+            raise UnsupportedFormat(f"Table {table!r} has no column(s) {', '.join(map(str, unknown))}.")
+
+        name = _quote(table)
+        select = ", ".join(f"t.{_quote(c)}" for c in columns)
+        total = info["rows"]
+        probe = pd.read_sql(f"SELECT {select} FROM {name} AS t LIMIT {SQLITE_PROBE_ROWS}", conn)
+        budget = (memory_budget_mb or DEFAULT_MEMORY_BUDGET_MB) * 1024 * 1024
+        capacity = max(int(budget // _bytes_per_row(apply_dtype_plan(probe, infer_dtype_plan(probe)))), 1)
+        size = min(total, capacity, sample_rows or total)
+
+        if size < total and _has_rowid(conn, name):
+            rowids = _sample_rowids(conn, name, total, size, seed)
+            conn.execute("CREATE TEMP TABLE insightsphere_sample (id INTEGER PRIMARY KEY)")
+            conn.executemany("INSERT INTO temp.insightsphere_sample VALUES (?)", ((int(r),) for r in rowids))
+            query = (
+                f"SELECT {select} FROM temp.insightsphere_sample AS s "
+                f"JOIN {name} AS t ON t.rowid = s.id ORDER BY s.id"
+            )
+            chunks = pd.read_sql(query, conn, chunksize=chunk_rows)
+            # Every row that leaves the database is already part of the sample.
+            result = ingest_chunks(chunks, memory_budget_mb, on_first_chunk, seed, stream_stats=False)
+            notice = _sample_notice(budget, len(result.df), total, requested=size < capacity)
+            profile = _sqlite_profile(conn, name, result.df, total) if STREAM_STATS else None
+            return IngestResult(result.df, total, sampled=True, notice=notice, profile=profile)
+
+        chunks = pd.read_sql(f"SELECT {select} FROM {name} AS t", conn, chunksize=chunk_rows)
+        return ingest_chunks(chunks, memory_budget_mb, on_first_chunk, seed, max_rows=sample_rows or None)
+
+
+# ---------------------------------------------------------------------------
+# ZIP archives
+# ---------------------------------------------------------------------------
+
+# Members parsed at once.
+ZIP_WORKERS = int(os.getenv("INSIGHTSPHERE_ZIP_WORKERS", str(min(8, os.cpu_count() or 1))))
+# Share of the memory budget that chunks parsed ahead of ingestion may hold.
+ZIP_READAHEAD_SHARE = 0.25
+DELIMITED_EXTENSIONS = (".csv", ".txt", ".tsv", ".log", ".dat")
+
+
+def _zip_members(archive):
+    """Supported data files in the archive, by name; folders, hidden files and nested archives are skipped."""
+    members = []
+    for info in archive.infolist():
+        name = info.filename.lower()
+        base = os.path.basename(name)
+        if info.is_dir() or not base or base.startswith(".") or name.startswith("__macosx/"):
+            continue
+        if name.rsplit(".", 1)[-1] in SUPPORTED_EXTENSIONS and not name.endswith((".zip", ".sqlite", ".sql")):
+            members.append(info)
+    return sorted(members, key=lambda info: info.filename)
+
+
+def _csv_options(name):
+    return {} if name.endswith(".csv") else {"sep": None, "engine": "python"}
+
+
+def _dominant_columns(archive, members):
+    """
+    The column set holding the most data among the delimited members, from
+    their header lines alone; None when there are none to peek at.
+    """
+    weights = collections.Counter()
+    for info in members:
+        name = info.filename.lower()
+        if not name.endswith(DELIMITED_EXTENSIONS):
+            continue
+        try:
+            with archive.open(info) as f:
+                header = pd.read_csv(f, nrows=0, **_csv_options(name)).columns
+        except Exception:
+            continue  # reported when the member itself fails to parse
+        weights[frozenset(map(str, header))] += info.file_size
+    return max(weights, key=weights.get) if weights else None
+
+
+def _member_frames(archive, info, chunk_rows):
+    """Parse one member straight from the archive, yielding raw chunks."""
+    name = info.filename.lower()
+    with archive.open(info) as f:
+        if name.endswith(DELIMITED_EXTENSIONS):
+            with pd.read_csv(f, chunksize=chunk_rows, **_csv_options(name)) as reader:
+                yield from reader
+            return
+        if name.endswith(".xml"):
+            yield from xml_chunks(f, chunk_rows)
+            return
+        if name.endswith(JSON_LINES_EXTENSIONS) or (name.endswith(".json") and is_json_lines(f)):
+            yield from json_lines_chunks(f)
+            return
+        # The remaining formats need random access: decompress into memory.
+        data = io.BytesIO(f.read())
+    if name.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(data).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+    yield _read_by_extension(data, name, None, None, {})
+
+
+def _numeric_text(frame):
+    """
+    Text columns whose every value parses as a number, converted: XML and
+    some JSON members carry numbers as text, and a column must have one
+    type across the members of a mixed archive.
+    """
+    for col in frame.columns:
+        if _is_text(frame[col]):
+            try:
+                frame[col] = pd.to_numeric(frame[col])
+            except (TypeError, ValueError):
+                pass  # stops at the first value that isn't a number
+    return frame
+
+
+class _ReadAhead:
+    """
+    Chunks parsed ahead of ingestion, one queue per member. Members other
+    than the one being ingested wait while the queued chunks hold more than
+    `limit_bytes`; the member being ingested never waits, so reading always
+    progresses.
+    """
+
+    def __init__(self, n_members, limit_bytes):
+        self.limit = limit_bytes
+        self.queues = [collections.deque() for _ in range(n_members)]
+        self.done = [False] * n_members
+        self.errors = [None] * n_members
+        self.stopped = [False] * n_members
+        self.held = 0
+        self.head = 0
+        self.cond = threading.Condition()
+
+    def produce(self, i, frames):
+        try:
+            for frame in frames:
+                size = int(frame.memory_usage(deep=True).sum())
+                with self.cond:
+                    while i != self.head and self.held and self.held + size > self.limit and not self.stopped[i]:
+                        self.cond.wait()
+                    if self.stopped[i]:
+                        return
+                    self.queues[i].append((frame, size))
+                    self.held += size
+                    self.cond.notify_all()
+        except Exception as e:
+            self.errors[i] = e
+        finally:
+            frames.close()
+            with self.cond:
+                self.done[i] = True
+                self.cond.notify_all()
+
+    def consume(self, i):
+        """Member `i`'s chunks, in order, as they are parsed."""
+        while True:
+            with self.cond:
+                if self.head != i:
+                    self.head = i
+                    self.cond.notify_all()
+                while not self.queues[i] and not self.done[i]:
+                    self.cond.wait()
+                if not self.queues[i]:
+                    return
+                frame, size = self.queues[i].popleft()
+                self.held -= size
+                self.cond.notify_all()
+            yield frame
+
+    def stop(self, i=None):
+        """Stop reading member `i` (every member when None) and drop its queued chunks."""
+        with self.cond:
+            for j in range(len(self.queues)) if i is None else [i]:
+                self.stopped[j] = True
+                self.held -= sum(size for _, size in self.queues[j])
+                self.queues[j].clear()
+            self.cond.notify_all()
+
+
+def _member_chunks(archive, members, workers, chunk_rows, skipped, schema=None, readahead_bytes=None):
+    """
+    Chunks of every member, in member order, while up to `workers` members
+    are parsed ahead on a thread pool (zlib and the C CSV parser release
+    the GIL). Chunks parsed ahead are held in a queue of at most
+    `readahead_bytes` (unbounded when None). Members whose first chunk's
+    columns aren't `schema` (a set of names; the first member's when None)
+    are left out and recorded in `skipped`, as are members that fail to
+    parse. Columns follow the first kept member's order, with columns that
+    appear later appended.
+    """
+    columns = None
+    buffer = _ReadAhead(len(members), float("inf") if readahead_bytes is None else readahead_bytes)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="insightsphere-zip")
+    try:
+        # Members start in order, so the one being ingested is always running or done.
+        for i, info in enumerate(members):
+            pool.submit(buffer.produce, i, _member_frames(archive, info, chunk_rows))
+        for i, info in enumerate(members):
+            rows = 0
+            for frame in buffer.consume(i):
+                if not rows:
+                    # Whether a member matches is settled by its first chunk, before any
+                    # of its rows are yielded.
+                    names = set(map(str, frame.columns))
+                    if schema is None:
+                        schema = names
+                    if names != schema or frame.columns.has_duplicates:
+                        skipped.append(f"{info.filename} (different columns)")
+                        buffer.stop(i)
+                        break
+                if columns is None:
+                    columns = list(frame.columns)
+                elif list(frame.columns) != columns:
+                    # Later chunks may add or drop columns (fields that only appear
+                    # further into an XML or JSON member); ingest_chunks fills the gaps.
+                    columns += [c for c in frame.columns if c not in columns]
+                    frame = frame[[c for c in columns if c in frame.columns]]
+                rows += len(frame)
+                yield _numeric_text(frame)
+            error = buffer.errors[i]
+            if error is not None:
+                partly = f" after {rows:,} rows" if rows else ""
+                skipped.append(f"{info.filename} ({type(error).__name__}{partly})")
+    finally:
+        buffer.stop()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def read_zip(source, memory_budget_mb=None, chunk_rows=DEFAULT_CHUNK_ROWS, on_first_chunk=None, workers=None):
+    """
+    Read every supported member of a ZIP archive as shards of one dataset.
+
+    Members are decompressed and parsed straight from the archive (never
+    extracted to disk) on `workers` threads, whose chunks parsed ahead of
+    ingestion hold at most ZIP_READAHEAD_SHARE of the memory budget. All
+    chunks go through a single `ingest_chunks` pass, so one dtype plan, one
+    memory budget and one reservoir sample cover all shards; text columns
+    that are entirely numeric are converted per chunk so members in
+    different formats agree on types. The shards' schema is the
+    column set with the most bytes behind it among the delimited members'
+    headers (or the first member's columns): members with those columns in
+    another order are realigned, the rest are skipped with a notice.
+    """
+    with zipfile.ZipFile(source) as archive:
+        members = _zip_members(archive)
+        if not members:
+            raise UnsupportedFormat("ZIP detected but no supported file inside.")
+        skipped = []
+        schema = _dominant_columns(archive, members)
+        readahead = (memory_budget_mb or DEFAULT_MEMORY_BUDGET_MB) * 1024 * 1024 * ZIP_READAHEAD_SHARE
+        chunks = _member_chunks(
+            archive, members, max(1, workers or ZIP_WORKERS), chunk_rows, skipped, schema, readahead
+        )
+        result = ingest_chunks(chunks, memory_budget_mb, on_first_chunk)
+    if len(skipped) == len(members):
+        raise UnsupportedFormat(f"No file in the ZIP could be read: {', '.join(skipped)}.")
+    if skipped:
+        listed = ", ".join(skipped[:5]) + (f" and {len(skipped) - 5} more" if len(skipped) > 5 else "")
+        note = f"Skipped {len(skipped)} of {len(members)} files in the ZIP: {listed}."
+        result.notice = f"{result.notice} {note}" if result.notice else note
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Format dispatch, shared by the Streamlit app and the batch CLI
+# ---------------------------------------------------------------------------
+
+SUPPORTED_EXTENSIONS = (
+    "csv", "xlsx", "json", "jsonl", "ndjson", "sql", "sqlite",
+    "xml", "txt", "tsv", "log", "dat", "yaml", "yml",
+    "parquet", "zip",
+)
+
+
+class UnsupportedFormat(ValueError):
+    """The file (or every member of an archive) is in a format we can't read."""
+
+
+def read_dataset(source, name, memory_budget_mb=None, on_preview=None, **sqlite):
+    """
+    Parse `source` (a path or binary file object) according to the
+    extension of `name`, within the memory budget. Streamed formats call
+    `on_preview` with their first chunk before the rest is read. SQLite
+    databases also take `read_sqlite`'s table, columns and sample_rows.
+
+    Returns an IngestResult; raises UnsupportedFormat.
+    """
+    result = _read_by_extension(source, name.lower(), memory_budget_mb, on_preview, sqlite)
+    if isinstance(result, pd.DataFrame):
+        result = fit_to_budget(result, memory_budget_mb)
+    return result
+
+
+def _read_by_extension(source, name, memory_budget_mb, on_preview, sqlite):
+    if name.endswith(".csv"):
+        return read_csv_chunked(source, memory_budget_mb, on_first_chunk=on_preview)
+
+    elif name.endswith(".xlsx"):
+        return pd.read_excel(source)
+
+    elif name.endswith(".json"):
+        if is_json_lines(source):
+            return read_json_lines_chunked(source, memory_budget_mb, on_first_chunk=on_preview)
+        return pd.read_json(source)
+
+    elif name.endswith(JSON_LINES_EXTENSIONS):
+        return read_json_lines_chunked(source, memory_budget_mb, on_first_chunk=on_preview)
+
+    elif name.endswith(".sqlite") or name.endswith(".sql"):
+        return read_sqlite(source, memory_budget_mb=memory_budget_mb, on_first_chunk=on_preview, **sqlite)
+
+    elif name.endswith(".xml"):
+        return read_xml_chunked(source, memory_budget_mb, on_first_chunk=on_preview)
+
+    elif name.endswith(".yaml") or name.endswith(".yml"):
+        import yaml
+
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                return pd.DataFrame(yaml.safe_load(f))
+        return pd.DataFrame(yaml.safe_load(source))
+
+    elif name.endswith(".txt") or name.endswith(".log") or name.endswith(".tsv") or name.endswith(".dat"):
+        return read_csv_chunked(source, memory_budget_mb, on_first_chunk=on_preview, sep=None, engine="python")
+
+    elif name.endswith(".parquet"):
+        return read_parquet_chunked(source, memory_budget_mb, on_first_chunk=on_preview)
+
+    elif name.endswith(".zip"):
+        return read_zip(source, memory_budget_mb, on_first_chunk=on_preview)
+
+    raise UnsupportedFormat(f"Unsupported format: {os.path.basename(name)}")
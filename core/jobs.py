@@ -0,0 +1,176 @@
+import os
+import shutil
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from core.charts import DEFAULT_OUTPUT_DIR
+from core.scheduler import PipelineCancelled
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+# Context values a finished job keeps; the rest (data frames, fitted
+# models, charts) is dropped so retained jobs cost little memory.
+SUMMARY_KEYS = (
+    "target_column", "best_model_name", "best_model_accuracy", "model_scores",
+    "model_training_partial", "report_path", "run_summary",
+)
+
+
+class Job:
+    """One pipeline run submitted to a JobManager, with its per-agent progress."""
+
+    def __init__(self, job_id, output_dir):
+        self.id = job_id
+        self.output_dir = output_dir
+        self.status = QUEUED
+        self.error = None
+        self.summary = None
+        self.report = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.stages = OrderedDict()
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def on_progress(self, event, agent_name, elapsed):
+        with self._lock:
+            self.stages[agent_name] = {"status": event, "elapsed": round(elapsed, 2), "at": time.time()}
+
+    def _set(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+    def snapshot(self):
+        """A consistent, JSON-friendly view of the job for polling clients."""
+        with self._lock:
+            now = self.finished or time.time()
+            stages = {}
+            for name, stage in self.stages.items():
+                stage = dict(stage)
+                if stage["status"] == "started":
+                    stage["elapsed"] = round(now - stage["at"], 2)
+                del stage["at"]
+                stages[name] = stage
+            return {
+                "id": self.id,
+                "status": self.status,
+                "cancel_requested": self.cancel_event.is_set(),
+                "error": self.error,
+                "report_ready": self.report is not None,
+                "queued_seconds": round((self.started or now) - self.submitted, 2),
+                "elapsed_seconds": round(now - self.started, 2) if self.started else 0.0,
+                "stages": stages,
+            }
+
+
+class JobManager:
+    """
+    Runs pipelines in the background on a bounded worker pool.
+
+    `submit()` returns a job ID straight away; `status()` reports which
+    agents have started or finished, `cancel()` stops the run before its
+    next agent, and `report()` fetches the finished PDF. Each job writes
+    to its own directory under `output_root`, so concurrent runs don't
+    overwrite each other's charts and reports. Only the most recent
+    `max_finished` finished jobs are kept, with their output directories,
+    report bytes and a small summary of the run.
+    """
+
+    def __init__(self, coordinator_factory, max_workers=2, output_root=DEFAULT_OUTPUT_DIR, max_finished=50):
+        self.coordinator_factory = coordinator_factory
+        self.output_root = output_root
+        self.max_finished = max_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="insightsphere-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def log(self, msg):
+        print(f"[JobManager] {msg}")
+
+    def submit(self, df, data_key=None, source_profile=None):
+        job_id = uuid.uuid4().hex[:12]
+        job = Job(job_id, os.path.join(self.output_root, job_id))
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+        self._pool.submit(self._run, job, df, data_key, source_profile)
+        self.log(f"Queued job {job_id}.")
+        return job_id
+
+    def _run(self, job, df, data_key, source_profile):
+        if job.cancel_event.is_set():
+            job._set(status=CANCELLED, finished=time.time())
+            return
+        job._set(status=RUNNING, started=time.time())
+        try:
+            context = self.coordinator_factory().run(
+                df,
+                data_key=data_key,
+                output_dir=job.output_dir,
+                progress=job.on_progress,
+                cancel=job.cancel_event,
+                source_profile=source_profile,
+            )
+        except PipelineCancelled:
+            job._set(status=CANCELLED, finished=time.time())
+            self.log(f"Job {job.id} cancelled.")
+        except Exception as e:
+            job._set(status=FAILED, error=f"{type(e).__name__}: {e}", finished=time.time())
+            self.log(f"Job {job.id} failed:\n{traceback.format_exc()}")
+        else:
+            job._set(
+                status=DONE,
+                summary={key: context.get(key) for key in SUMMARY_KEYS},
+                report=context.get("report_pdf"),
+                finished=time.time(),
+            )
+            self.log(f"Job {job.id} done.")
+
+    def _get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise KeyError(f"Unknown job: {job_id}")
+        return job
+
+    def status(self, job_id):
+        return self._get(job_id).snapshot()
+
+    def cancel(self, job_id):
+        """Ask a job to stop; the agent running now finishes first. False if already finished."""
+        job = self._get(job_id)
+        if job.status in FINISHED:
+            return False
+        job.cancel_event.set()
+        return True
+
+    def result(self, job_id):
+        """The finished run's SUMMARY_KEYS values (None until the job is done)."""
+        return self._get(job_id).summary
+
+    def report(self, job_id):
+        """The job's PDF report as bytes, or None if it isn't (yet) available."""
+        return self._get(job_id).report
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.status in FINISHED]
+        for job in finished[: max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job.id]
+            shutil.rmtree(job.output_dir, ignore_errors=True)
+
+    def shutdown(self, cancel=True):
+        if cancel:
+            with self._lock:
+                for job in self._jobs.values():
+                    job.cancel_event.set()
+        self._pool.shutdown(wait=True)
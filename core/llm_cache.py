@@ -0,0 +1,145 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.getenv("INSIGHTSPHERE_CACHE_DIR", ".cache")
+
+
+def cache_disabled_by_env():
+    return os.getenv("INSIGHTSPHERE_LLM_CACHE", "on").lower() in ("0", "off", "false", "no")
+
+
+def make_key(model, temperature, prompt):
+    """Content address of a request: model name + temperature + prompt hash."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return f"{model}|{float(temperature):.3f}|{prompt_hash}"
+
+
+class LLMCache:
+    """
+    On-disk cache of LLM responses backed by a single SQLite file.
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted once the cache holds more than `max_entries` responses or more
+    than `max_bytes` of response text. `enabled=False` (or the environment
+    variable INSIGHTSPHERE_LLM_CACHE=off) turns every lookup into a miss and
+    every store into a no-op.
+    """
+
+    def __init__(
+        self,
+        path=None,
+        ttl=7 * 24 * 3600,
+        max_entries=5000,
+        max_bytes=50 * 1024 * 1024,
+        enabled=True,
+    ):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "llm_cache.sqlite")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled and not cache_disabled_by_env()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, model, temperature, prompt):
+        """Cached response text, or None on a miss / expired entry / bypass."""
+        if not self.enabled:
+            return None
+        key = make_key(model, temperature, prompt)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, model, temperature, prompt, response):
+        if not self.enabled:
+            return
+        key = make_key(model, temperature, prompt)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, created, accessed)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, response, len(response.encode("utf-8")), now, now),
+                )
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error:
+                # Don't leave a half-done write holding the database lock.
+                conn.rollback()
+                raise
+
+    def _evict(self, conn):
+        if self.ttl is not None:
+            cur = conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+            self.evictions += max(cur.rowcount, 0)
+
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Walk entries from least to most recently used until both bounds hold.
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self.evictions += len(stale)
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
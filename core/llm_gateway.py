@@ -0,0 +1,187 @@
+import contextvars
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from core.llm_cache import LLMCache
+from core.tracing import record_llm_call
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+
+
+@dataclass
+class LLMResult:
+    """Outcome of a single prompt sent through the gateway."""
+
+    text: Optional[str]
+    latency: float
+    attempts: int
+    error: Optional[Exception] = None
+    cached: bool = False
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def is_rate_limit_error(exc):
+    """True for HTTP 429 / RateLimitError style failures from chat-completions clients."""
+    if getattr(exc, "status_code", None) == 429:
+        return True
+    return "ratelimit" in type(exc).__name__.lower()
+
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """
+    Thread-pooled access to a chat-completions client shared by the LLM agents.
+
+    Independent prompts are fanned out concurrently, with at most
+    `max_concurrency` requests in flight across every caller of the gateway.
+    Rate-limit errors are retried with exponential backoff, every call carries
+    a timeout, and each prompt's latency is reported back to the caller.
+
+    Any object exposing `chat.completions.create(model=..., messages=...,
+    temperature=..., timeout=...)` can be passed as `client`, which keeps the
+    gateway testable against a local fake instead of the Groq API.
+
+    Successful responses are stored in `cache` (an `LLMCache`; a default
+    on-disk one is used unless `cache=False`), so identical prompts on a
+    re-run are answered without a network round-trip.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        model=DEFAULT_MODEL,
+        max_concurrency=4,
+        timeout=30.0,
+        max_retries=3,
+        backoff=1.0,
+        cache=None,
+    ):
+        self._client = client
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._client_lock = threading.Lock()
+        if cache is None:
+            cache = LLMCache()
+        self.cache = cache or None
+
+    def fingerprint(self):
+        """What changes the answers (for stage checkpoints): the model."""
+        return self.model
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._build_client()
+        return self._client
+
+    def _build_client(self):
+        import httpx
+        from groq import DefaultHttpxClient, Groq
+
+        # One keep-alive pool sized to the concurrency cap, reused by every call.
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+        )
+        # Retries are handled here so backoff is consistent across clients.
+        return Groq(
+            api_key=os.getenv("GROQ_API_KEY"),
+            max_retries=0,
+            http_client=DefaultHttpxClient(limits=limits),
+        )
+
+    def _complete(self, prompt, temperature):
+        resp = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            timeout=self.timeout,
+        )
+        return resp.choices[0].message.content.strip()
+
+    def submit(self, prompt, temperature=0.5):
+        """Send one prompt, retrying rate limits; never raises, see `LLMResult.error`."""
+        result = self._submit(prompt, temperature)
+        record_llm_call(result)
+        return result
+
+    def _submit(self, prompt, temperature):
+        start = time.perf_counter()
+        if self.cache is not None:
+            try:
+                text = self.cache.get(self.model, temperature, prompt)
+            except (sqlite3.Error, OSError):
+                # e.g. locked by another batch worker, or a read-only cache dir: a miss.
+                text = None
+            if text is not None:
+                return LLMResult(text, time.perf_counter() - start, 0, cached=True)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                with self._slots:
+                    text = self._complete(prompt, temperature)
+                break
+            except Exception as e:
+                if attempt > self.max_retries or not is_rate_limit_error(e):
+                    return LLMResult(None, time.perf_counter() - start, attempt, e)
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = self.backoff * (2 ** (attempt - 1)) * (1 + random.random())
+                time.sleep(delay)
+
+        if self.cache is not None:
+            try:
+                self.cache.put(self.model, temperature, prompt, text)
+            except (sqlite3.Error, OSError):
+                pass  # the response is still good; it just isn't stored
+        return LLMResult(text, time.perf_counter() - start, attempt)
+
+    def ask(self, prompt, temperature=0.5):
+        """Send one prompt and return its text, raising the last error on failure."""
+        result = self.submit(prompt, temperature)
+        if not result.ok:
+            raise result.error
+        return result.text
+
+    def ask_many(self, prompts, temperature=0.5):
+        """
+        Send a dict of independent prompts concurrently.
+
+        Returns a dict with the same keys mapping to `LLMResult`s.
+        """
+        if not prompts:
+            return {}
+        workers = min(self.max_concurrency, len(prompts))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm") as pool:
+            # Each call runs in a copy of the caller's context so tracing
+            # attributes it to the calling agent.
+            futures = {
+                key: pool.submit(contextvars.copy_context().run, self.submit, prompt, temperature)
+                for key, prompt in prompts.items()
+            }
+            return {key: fut.result() for key, fut in futures.items()}
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+
+# One-vs-rest ROC curves drawn at most; AUCs are still computed for every class.
+MAX_ROC_CURVES = 10
+
+
+def _plain(value):
+    """numpy scalar -> Python scalar, so metrics serialize and print cleanly."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _safe_div(num, den):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = num / den
+    return np.where(den > 0, out, 0.0)
+
+
+def one_vs_rest_auc(y_codes, proba):
+    """
+    ROC AUC of every probability column against its own class, all at once:
+    the Mann-Whitney rank-sum form, with tied scores sharing their average
+    rank (the same value as `roc_auc_score`). `y_codes[i]` is the column
+    of row i's true class (-1 when the model never saw it). Classes without
+    both positive and negative rows get NaN.
+    """
+    n, k = proba.shape
+    positives = y_codes[:, None] == np.arange(k)
+    n_pos = positives.sum(axis=0)
+    n_neg = n - n_pos
+    ranks = rankdata(proba, axis=0)
+    rank_sum = np.where(positives, ranks, 0.0).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        auc = (rank_sum - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg)
+    auc[(n_pos == 0) | (n_neg == 0)] = np.nan
+    return auc
+
+
+def classification_metrics(model, X, y):
+    """
+    Evaluate a fitted classifier with a single prediction pass over `X`.
+
+    With `predict_proba`, the class probabilities are computed once and the
+    predictions are their argmax; otherwise `predict` is called. Everything
+    else - confusion matrix, class distribution, per-class precision /
+    recall / F1, one-vs-rest and macro AUC - is derived from those arrays
+    with vectorized counts.
+    """
+    y = np.asarray(y)
+    proba = None
+    model_classes = np.asarray(getattr(model, "classes_", []))
+    if hasattr(model, "predict_proba") and len(model_classes):
+        proba = np.asarray(model.predict_proba(X), dtype="float64")
+        preds = model_classes[proba.argmax(axis=1)]
+    else:
+        preds = np.asarray(model.predict(X))
+
+    # Test labels the model never saw still get their confusion-matrix row.
+    labels = np.union1d(np.union1d(model_classes, np.unique(y)), np.unique(preds))
+    k = len(labels)
+    y_idx = np.searchsorted(labels, y)
+    p_idx = np.searchsorted(labels, preds)
+    cm = np.bincount(y_idx * k + p_idx, minlength=k * k).reshape(k, k)
+
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    tp = np.diag(cm)
+    precision = _safe_div(tp, predicted)
+    recall = _safe_div(tp, support)
+    f1 = _safe_div(2 * precision * recall, precision + recall)
+    present = support > 0
+
+    names = [str(_plain(label)) for label in labels]
+    metrics = {
+        "labels": [_plain(label) for label in labels],
+        "n_samples": int(len(y)),
+        "accuracy": float(tp.sum() / max(len(y), 1)),
+        "confusion_matrix": cm,
+        "class_counts": dict(zip(names, support.tolist())),
+        "class_shares": dict(zip(names, np.round(support / max(len(y), 1), 4).tolist())),
+        "per_class": {
+            name: {
+                "precision": round(float(precision[i]), 4),
+                "recall": round(float(recall[i]), 4),
+                "f1": round(float(f1[i]), 4),
+                "support": int(support[i]),
+            }
+            for i, name in enumerate(names)
+        },
+        "macro_f1": float(f1[present].mean()) if present.any() else 0.0,
+        "auc": None,
+        "auc_macro": None,
+        "auc_weighted": None,
+        "auc_per_class": {},
+        "roc_curves": [],
+    }
+    if proba is None:
+        return metrics
+
+    # AUC columns follow the model's classes; rows of unseen classes are -1.
+    class_pos = np.minimum(np.searchsorted(model_classes, y), len(model_classes) - 1)
+    class_pos = np.where(model_classes[class_pos] == y, class_pos, -1)
+    if len(model_classes) == 2:
+        auc = one_vs_rest_auc(class_pos, proba)[1]
+        if not np.isnan(auc):
+            metrics["auc"] = metrics["auc_macro"] = metrics["auc_weighted"] = float(auc)
+            metrics["auc_per_class"] = {str(_plain(model_classes[1])): float(auc)}
+            metrics["roc_curves"] = [_roc_curve(None, class_pos == 1, proba[:, 1], auc)]
+        return metrics
+
+    aucs = one_vs_rest_auc(class_pos, proba)
+    valid = ~np.isnan(aucs)
+    if valid.any():
+        counts = np.bincount(class_pos[class_pos >= 0], minlength=len(model_classes))
+        metrics["auc_macro"] = float(aucs[valid].mean())
+        metrics["auc_weighted"] = float(np.average(aucs[valid], weights=counts[valid]))
+        metrics["auc"] = metrics["auc_macro"]
+        metrics["auc_per_class"] = {
+            str(_plain(c)): round(float(a), 4) for c, a in zip(model_classes, aucs) if not np.isnan(a)
+        }
+        drawn = np.flatnonzero(valid)[:MAX_ROC_CURVES]
+        metrics["roc_curves"] = [
+            _roc_curve(str(_plain(model_classes[j])), class_pos == j, proba[:, j], aucs[j]) for j in drawn
+        ]
+    return metrics
+
+
+def _roc_curve(label, positive, scores, auc):
+    from sklearn.metrics import roc_curve
+
+    fpr, tpr, _ = roc_curve(positive, scores)
+    return {"label": label, "fpr": fpr, "tpr": tpr, "auc": float(auc)}
+
+
+def prompt_summaries(metrics):
+    """The compact, JSON-friendly views InsightAgent puts into its prompts."""
+    names = [str(label) for label in metrics["labels"]]
+    cm = metrics["confusion_matrix"]
+    conf_matrix_info = {
+        "labels": names,
+        "matrix": cm.tolist(),
+        "accuracy": round(metrics["accuracy"], 4),
+        "macro_f1": round(metrics["macro_f1"], 4),
+        "recall_by_class": {n: v["recall"] for n, v in metrics["per_class"].items()},
+        "precision_by_class": {n: v["precision"] for n, v in metrics["per_class"].items()},
+    }
+    if len(names) > 2:
+        off_diagonal = cm.copy()
+        np.fill_diagonal(off_diagonal, 0)
+        if off_diagonal.any():
+            i, j = np.unravel_index(off_diagonal.argmax(), cm.shape)
+            conf_matrix_info["most_common_confusion"] = {
+                "true": names[i], "predicted": names[j], "count": int(cm[i, j])
+            }
+    target_info = {
+        "counts": metrics["class_counts"],
+        "shares": metrics["class_shares"],
+    }
+    return conf_matrix_info, target_info
+
+
+def confusion_frame(metrics):
+    """Confusion matrix as a labelled DataFrame, for the heatmap axes."""
+    names = [str(label) for label in metrics["labels"]]
+    return pd.DataFrame(metrics["confusion_matrix"], index=names, columns=names)
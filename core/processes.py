@@ -0,0 +1,14 @@
+"""
+Start method for the worker-process pools (model training, chart rendering).
+
+Pools are created from job and prewarm threads, and forking a threaded
+process can copy a lock held by another thread into the child; forkserver
+(spawn where unavailable) starts workers from a clean process instead.
+"""
+import multiprocessing
+
+
+def process_context():
+    """The multiprocessing context worker pools are created from."""
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
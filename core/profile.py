@@ -0,0 +1,307 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+BLANKS = ["", " "]
+
+
+def is_text_dtype(dtype):
+    return dtype == object or pd.api.types.is_string_dtype(dtype)
+
+
+class TextBlock:
+    """
+    All text columns of a frame factorized together into one integer code
+    matrix (rows x columns) over a shared table of distinct strings.
+
+    Every per-column statistic the cleaner needs — missingness, numeric parse
+    rates, modes — is computed on the codes with array operations, and each
+    distinct string is parsed as a number at most once, however many rows or
+    columns it appears in.
+    """
+
+    def __init__(self, frame):
+        self.columns = frame.columns
+        n_rows, n_cols = frame.shape
+        codes, uniques = pd.factorize(frame.to_numpy(dtype=object).ravel(order="F"))
+        uniques = np.asarray(uniques, dtype=object)
+
+        # Empty strings count as missing: remap their codes to -1
+        if len(uniques):
+            remap = np.arange(len(uniques))
+            remap[np.isin(uniques, BLANKS)] = -1
+            codes = np.where(codes >= 0, remap[codes], -1)
+
+        self.codes = codes.reshape((n_rows, n_cols), order="F")
+        self.uniques = uniques
+        self._parsed = np.full(len(uniques), np.nan)
+        self._is_parsed = np.zeros(len(uniques), dtype=bool)
+
+    def missing(self):
+        return (self.codes < 0).sum(axis=0)
+
+    def select(self, col_mask):
+        self.codes = self.codes[:, col_mask]
+        self.columns = self.columns[col_mask]
+
+    def as_numbers(self, codes):
+        """Numeric value of every code in `codes` (NaN where unparseable/missing)."""
+        present = np.unique(codes[codes >= 0])
+        todo = present[~self._is_parsed[present]]
+        if len(todo):
+            parsed = pd.to_numeric(pd.Series(self.uniques[todo], dtype=object), errors="coerce")
+            self._parsed[todo] = parsed.to_numpy(dtype="float64", na_value=np.nan)
+            self._is_parsed[todo] = True
+        return np.where(codes >= 0, self._parsed[np.maximum(codes, 0)], np.nan)
+
+    def numeric_candidates(self, sample_rows=512, min_rate=0.5, seed=0):
+        """
+        Columns worth parsing in full: a shared row sample must already parse
+        at `min_rate` or better. A column that needs 70% overall but parses
+        below 50% on 512 sampled rows is vanishingly unlikely to qualify.
+        """
+        n_rows = self.codes.shape[0]
+        if n_rows <= sample_rows:
+            return np.ones(self.codes.shape[1], dtype=bool)
+        rows = np.random.default_rng(seed).choice(n_rows, sample_rows, replace=False)
+        values = self.as_numbers(self.codes[rows])
+        return (~np.isnan(values)).sum(axis=0) >= min_rate * sample_rows
+
+    def modes(self, col_idx):
+        """
+        Most frequent code per column (ties go to the smallest string, like
+        Series.mode); -1 for columns with no values at all.
+        """
+        n_uniques = len(self.uniques)
+        sub = self.codes[:, col_idx]
+        cols = np.broadcast_to(np.arange(len(col_idx)), sub.shape)
+        valid = sub >= 0
+        keys, counts = np.unique(cols[valid].astype(np.int64) * n_uniques + sub[valid], return_counts=True)
+        key_col, key_code = np.divmod(keys, n_uniques)
+        result = np.full(len(col_idx), -1, dtype=np.int64)
+        if not len(keys):
+            return result
+
+        rank = np.empty(n_uniques, dtype=np.int64)
+        rank[np.argsort(self.uniques.astype(str), kind="stable")] = np.arange(n_uniques)
+        order = np.lexsort((rank[key_code], -counts, key_col))
+        first = order[np.r_[True, key_col[order][1:] != key_col[order][:-1]]]
+        result[key_col[first]] = key_code[first]
+        return result
+
+
+# Numeric columns are profiled in groups of about this many bytes (as
+# float64), so the sorted copy never approaches the size of the frame.
+PROFILE_BLOCK_BYTES = 64 * 1024 * 1024
+QUANTILES = (0.25, 0.5, 0.75)
+STAT_COLUMNS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+class DataProfile:
+    """
+    Per-column statistics of a frame from one profiling pass, shared by the
+    agents through the context instead of each rescanning the data.
+
+    `table` has one row per column: dtype, kind (numeric, boolean, text,
+    categorical, datetime, other), count, null_count, blank_count (empty
+    strings in text columns), missing (null + blank), missing_share,
+    nunique, top / top_count, and for numeric columns mean, std, min,
+    quartiles and max. `text` keeps the factorized text columns so the
+    cleaner can reuse them; it isn't pickled.
+
+    Profiles built from sketches (core.sketches) carry `error_bounds`:
+    quantile_rank_error (normalized rank error of the quartiles),
+    nunique_relative_error (relative standard error of nunique) and
+    top_count_error (per column, how far top_count may undercount).
+    Exact profiles have `error_bounds` None.
+    """
+
+    def __init__(self, table, n_rows, memory_bytes, text=None, error_bounds=None):
+        self.table = table
+        self.n_rows = n_rows
+        self.n_cols = len(table)
+        self.memory_bytes = memory_bytes
+        self.text = text
+        self.error_bounds = error_bounds
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["text"] = None
+        return state
+
+    @property
+    def shape(self):
+        return (self.n_rows, self.n_cols)
+
+    @property
+    def approximate(self):
+        return self.error_bounds is not None
+
+    def renamed(self, columns):
+        """A copy with the columns relabelled (same order), e.g. after stripping names."""
+        profile = copy.copy(self)
+        profile.table = self.table.set_axis(pd.Index(columns))
+        if self.error_bounds is not None:
+            profile.error_bounds = dict(self.error_bounds)
+            profile.error_bounds["top_count_error"] = self.error_bounds["top_count_error"].set_axis(
+                pd.Index(columns)
+            )
+        return profile
+
+    def text_block(self):
+        """A TextBlock of the text columns the caller may narrow down, or None."""
+        return copy.copy(self.text) if self.text is not None else None
+
+    def describe(self, limit=None):
+        """Numeric summary in the layout of `DataFrame.describe().T`."""
+        numeric = self.table[self.table["kind"] == "numeric"][STAT_COLUMNS].astype("float64")
+        return numeric.iloc[:limit] if limit is not None else numeric
+
+    def missing(self):
+        """Missing values (NaN or blank) per column, for the columns that have any."""
+        missing = self.table["missing"]
+        return missing[missing > 0]
+
+    def schema(self, limit=None):
+        """(column, dtype) pairs in column order."""
+        dtypes = self.table["dtype"]
+        if limit is not None:
+            dtypes = dtypes.iloc[:limit]
+        return list(dtypes.items())
+
+
+def _kind(dtype):
+    if pd.api.types.is_bool_dtype(dtype):
+        return "boolean"
+    if isinstance(dtype, pd.CategoricalDtype):
+        return "categorical"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "datetime"
+    if is_text_dtype(dtype):
+        return "text"
+    if pd.api.types.is_numeric_dtype(dtype) and not isinstance(dtype, pd.SparseDtype):
+        return "numeric"
+    return "other"
+
+
+def _numeric_stats(values):
+    """
+    Column statistics of a float64 block (rows x columns) from one sort:
+    NaNs sort last, so each column's non-missing values are a sorted
+    prefix of known length, which gives count, min, max, distinct values
+    and linearly interpolated quantiles (as `describe` computes them).
+    """
+    ordered = np.sort(values, axis=0)
+    valid = ~np.isnan(ordered)
+    count = valid.sum(axis=0)
+    n_cols = values.shape[1]
+    has = count > 0
+    stats = {"count": count.astype("float64")}
+
+    last = np.maximum(count - 1, 0)
+    cols = np.arange(n_cols)
+    stats["min"] = np.where(has, ordered[0], np.nan)
+    stats["max"] = np.where(has, ordered[last, cols], np.nan)
+    for q in QUANTILES:
+        pos = last * q
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        low, high = ordered[lo, cols], ordered[hi, cols]
+        stats[f"{q:.0%}"] = np.where(has, low + (high - low) * (pos - lo), np.nan)
+
+    changes = (ordered[1:] != ordered[:-1]) & valid[1:]
+    stats["nunique"] = (has + changes.sum(axis=0)).astype(np.int64)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total = np.where(valid, ordered, 0.0).sum(axis=0)
+        mean = np.where(has, total / np.maximum(count, 1), np.nan)
+        centred = np.where(valid, ordered - mean, 0.0)
+        var = (centred * centred).sum(axis=0) / (count - 1)
+    stats["mean"] = mean
+    stats["std"] = np.where(count > 1, np.sqrt(var), np.nan)
+    return stats
+
+
+def _text_stats(text):
+    """Distinct values and most frequent value per text column, from the codes."""
+    n_uniques = max(len(text.uniques), 1)
+    n_cols = text.codes.shape[1]
+    cols = np.broadcast_to(np.arange(n_cols), text.codes.shape)
+    valid = text.codes >= 0
+    keys, counts = np.unique(cols[valid].astype(np.int64) * n_uniques + text.codes[valid], return_counts=True)
+    key_col = keys // n_uniques
+    nunique = np.bincount(key_col, minlength=n_cols)
+
+    modes = text.modes(np.arange(n_cols))
+    top_count = np.zeros(n_cols, dtype=np.int64)
+    found = modes >= 0
+    if found.any():
+        top_count[found] = counts[np.searchsorted(keys, np.flatnonzero(found) * n_uniques + modes[found])]
+    top = [text.uniques[m] if m >= 0 else None for m in modes]
+    return nunique, top, top_count
+
+
+def profile_frame(df):
+    """Profile every column of `df` in one vectorized pass per dtype group."""
+    n_rows = len(df)
+    dtypes = list(df.dtypes)
+    kinds = [_kind(dt) for dt in dtypes]
+    table = pd.DataFrame(
+        {"dtype": [str(dt) for dt in dtypes], "kind": kinds},
+        index=pd.Index(df.columns),
+    )
+    for name in ["count", "null_count", "blank_count", "nunique", "top_count"] + STAT_COLUMNS[1:]:
+        table[name] = np.nan
+    table["top"] = None
+
+    positions = {kind: np.flatnonzero(np.array(kinds) == kind) for kind in set(kinds)}
+    null_count = df.isna().sum().to_numpy()
+    table["null_count"] = null_count
+    table["blank_count"] = 0
+
+    # Numeric columns, a group of columns at a time.
+    num_pos = positions.get("numeric", np.array([], dtype=int))
+    if len(num_pos):
+        group = max(1, PROFILE_BLOCK_BYTES // max(n_rows * 8, 1))
+        for start in range(0, len(num_pos), group):
+            idx = num_pos[start:start + group]
+            values = df.iloc[:, idx].to_numpy(dtype="float64", na_value=np.nan)
+            for name, column in _numeric_stats(values).items():
+                table.iloc[idx, table.columns.get_loc(name)] = column
+
+    # Text columns, factorized together.
+    text = None
+    text_pos = positions.get("text", np.array([], dtype=int))
+    if len(text_pos):
+        text = TextBlock(df.iloc[:, text_pos])
+        missing = text.missing()
+        table.iloc[text_pos, table.columns.get_loc("blank_count")] = missing - null_count[text_pos]
+        nunique, top, top_count = _text_stats(text)
+        table.iloc[text_pos, table.columns.get_loc("nunique")] = nunique
+        table.iloc[text_pos, table.columns.get_loc("top_count")] = top_count
+        table.iloc[text_pos, table.columns.get_loc("top")] = pd.Series(top, dtype=object).to_numpy()
+
+    # Categoricals from their integer codes; the rest column by column (rare).
+    for kind in ("categorical", "boolean", "datetime", "other"):
+        for i in positions.get(kind, ()):
+            s = df.iloc[:, i]
+            if kind == "categorical":
+                codes = s.cat.codes.to_numpy()
+                counts = np.bincount(codes[codes >= 0], minlength=len(s.cat.categories))
+                nunique, top_i = int((counts > 0).sum()), int(counts.argmax()) if counts.sum() else -1
+                top, top_count = (s.cat.categories[top_i], counts[top_i]) if top_i >= 0 else (None, 0)
+            else:
+                counts = s.value_counts(dropna=True)
+                nunique = len(counts)
+                top, top_count = (counts.index[0], counts.iloc[0]) if nunique else (None, 0)
+            table.iat[i, table.columns.get_loc("nunique")] = nunique
+            table.iat[i, table.columns.get_loc("top_count")] = top_count
+            table.iat[i, table.columns.get_loc("top")] = top
+
+    table["missing"] = (table["null_count"] + table["blank_count"]).astype(np.int64)
+    table["count"] = n_rows - table["missing"]
+    table["missing_share"] = table["missing"] / n_rows if n_rows else 0.0
+    for name in ("null_count", "blank_count", "nunique", "top_count"):
+        table[name] = table[name].fillna(0).astype(np.int64)
+    return DataProfile(table, n_rows, int(df.memory_usage(deep=False).sum()), text)
@@ -0,0 +1,67 @@
+"""
+Process-wide pipeline resources, kept out of the import path of the UI.
+
+Importing `core.coordinator` pulls in scikit-learn, matplotlib, seaborn
+and reportlab (seconds of import time), so the app only imports this
+module at start-up. `prewarm()` loads the heavy modules and builds the
+shared coordinator on a background thread while the user is still picking
+a file; `get_coordinator()` returns that same instance to every run, so
+agents, the LLM client and its HTTP connection pool, the chart worker
+pool and the caches are set up once per process. Runs go through the
+shared JobManager (`get_job_manager()`), which executes them in the
+background so the UI can poll progress and offer cancellation.
+"""
+import os
+import threading
+
+_lock = threading.Lock()
+_coordinator = None
+_job_manager = None
+_warm_thread = None
+
+# Pipelines allowed to run at once; further submissions queue.
+MAX_CONCURRENT_JOBS = int(os.getenv("INSIGHTSPHERE_MAX_JOBS", "2"))
+
+
+def get_coordinator():
+    """The shared PipelineCoordinator, built on first use."""
+    global _coordinator
+    if _coordinator is None:
+        with _lock:
+            if _coordinator is None:
+                from core.coordinator import PipelineCoordinator
+
+                _coordinator = PipelineCoordinator()
+    return _coordinator
+
+
+def get_job_manager():
+    """The shared JobManager; jobs run on the shared coordinator."""
+    global _job_manager
+    if _job_manager is None:
+        with _lock:
+            if _job_manager is None:
+                from core.jobs import JobManager
+
+                _job_manager = JobManager(get_coordinator, max_workers=MAX_CONCURRENT_JOBS)
+    return _job_manager
+
+
+def _warm():
+    coordinator = get_coordinator()
+    try:
+        # Builds the LLM client (and imports its SDK) ahead of the first call.
+        coordinator.gateway.client
+    except Exception:
+        # e.g. no API key yet: the agents report it when they actually call.
+        pass
+
+
+def prewarm():
+    """Start building the shared coordinator in the background; idempotent."""
+    global _warm_thread
+    with _lock:
+        if _warm_thread is None:
+            _warm_thread = threading.Thread(target=_warm, name="insightsphere-prewarm", daemon=True)
+            _warm_thread.start()
+    return _warm_thread
@@ -0,0 +1,159 @@
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class PipelineError(Exception):
+    """Raised when agent key declarations can't form a valid pipeline."""
+
+
+class PipelineCancelled(Exception):
+    """Raised when a run is cancelled before all of its stages have run."""
+
+
+class Stage:
+    """One agent in the DAG, with the stages it must wait for."""
+
+    def __init__(self, index, agent):
+        self.index = index
+        self.agent = agent
+        self.name = agent.name
+        self.reads = getattr(agent, "reads", None)
+        self.optional_reads = getattr(agent, "optional_reads", ()) or ()
+        self.writes = getattr(agent, "writes", None)
+        self.deps = set()
+
+    @property
+    def declared(self):
+        return self.reads is not None and self.writes is not None
+
+
+def build_dag(agents, initial_keys=(), shared_keys=()):
+    """
+    Link agents through the context keys they declare.
+
+    Each agent depends on the nearest earlier agent that writes any key it
+    reads (`reads`) or may read (`optional_reads`). An agent that declares
+    nothing is treated as a barrier: it runs after everything before it and
+    before everything after it, exactly as in a plain sequential pipeline.
+
+    Raises PipelineError when a required key is never produced, or when two
+    agents write the same key (except `shared_keys`, which every writer
+    only adds entries to).
+    """
+    stages = [Stage(i, a) for i, a in enumerate(agents)]
+    available = set(initial_keys)
+    writers = {}
+    problems = []
+    last_barrier = None
+
+    for stage in stages:
+        if not stage.declared:
+            stage.deps = {s.index for s in stages[:stage.index]}
+            last_barrier = stage.index
+            continue
+
+        if last_barrier is not None:
+            stage.deps.add(last_barrier)
+        for key in stage.reads:
+            if key in writers:
+                stage.deps.add(writers[key])
+            elif key not in available and last_barrier is None:
+                problems.append(f"{stage.name} reads '{key}', which no earlier agent writes")
+        for key in stage.optional_reads:
+            if key in writers:
+                stage.deps.add(writers[key])
+        for key in stage.writes:
+            if key in writers and key not in shared_keys:
+                problems.append(
+                    f"'{key}' is written by both {stages[writers[key]].name} and {stage.name}"
+                )
+            writers[key] = stage.index
+
+    if problems:
+        raise PipelineError("Invalid pipeline:\n  " + "\n  ".join(problems))
+    return stages
+
+
+def critical_path(stages, seconds):
+    """
+    Longest chain of dependent stages given each stage's measured run time
+    (`seconds`, by stage index): returns (stage names, total seconds).
+    """
+    finish = {}
+    via = {}
+    for stage in stages:
+        prev = max(stage.deps, key=lambda i: finish[i], default=None)
+        finish[stage.index] = seconds.get(stage.index, 0.0) + (finish[prev] if prev is not None else 0.0)
+        via[stage.index] = prev
+    if not finish:
+        return [], 0.0
+    end = max(finish, key=finish.get)
+    total = finish[end]
+    chain = []
+    while end is not None:
+        chain.append(stages[end].name)
+        end = via[end]
+    return chain[::-1], total
+
+
+def run_dag(stages, context, max_workers=None, trace=None, run_stage=None, cancel=None):
+    """
+    Run stages on a thread pool as soon as their dependencies finish.
+
+    Agents share the one `context` dict; the DAG guarantees no agent reads a
+    key while its writer is still running and that no two running agents
+    write the same key. The first agent exception cancels what hasn't
+    started and is re-raised once running stages have finished.
+    Each stage runs inside `trace.stage(...)` when a RunTrace is given, and
+    through `run_stage(stage, context)` instead of `agent.run` when given.
+    Setting the `cancel` event stops new stages from starting; running ones
+    finish (agents aren't interrupted) and PipelineCancelled is raised.
+    Returns each stage's run time in seconds, by stage index.
+    """
+    remaining = {s.index: set(s.deps) for s in stages}
+    running = {}
+    lock = threading.Lock()
+    error = None
+    seconds = {}
+
+    def execute(stage):
+        start = time.perf_counter()
+        try:
+            with trace.stage(stage.agent, context) if trace is not None else nullcontext():
+                if run_stage is not None:
+                    result = run_stage(stage, context)
+                else:
+                    result = stage.agent.run(context)
+            if result is not None and result is not context:
+                with lock:
+                    context.update(result)
+        finally:
+            seconds[stage.index] = time.perf_counter() - start
+        return stage
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1) as pool:
+        while remaining or running:
+            if error is None and cancel is not None and cancel.is_set():
+                error = PipelineCancelled(f"Cancelled with {len(remaining)} stage(s) not started")
+                remaining.clear()
+            if error is None:
+                for index in [i for i, deps in remaining.items() if not deps]:
+                    del remaining[index]
+                    running[pool.submit(execute, stages[index])] = index
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                for deps in remaining.values():
+                    deps.discard(index)
+            if error is not None:
+                remaining.clear()
+    if error is not None:
+        raise error
+    return seconds
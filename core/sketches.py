@@ -0,0 +1,459 @@
+"""
+Mergeable sketches for profiling data chunk by chunk, when the whole
+dataset never sits in memory at once.
+
+Every sketch takes whole arrays in `update()` and combines with another
+sketch of the same kind in `merge()`, so chunks (or files, or workers) can
+be summarised separately and folded together. `SketchProfiler` runs one
+set per column and produces the same DataProfile the exact profiler does,
+with the error bounds of its approximate figures attached:
+
+    count, missing, mean, std, min, max   exact (Welford / Chan moments)
+    quartiles                             KLL: normalized rank error
+                                          quantile_rank_error(k), ~1.3% at
+                                          k=200, with 99% confidence
+    nunique                               HyperLogLog: relative standard
+                                          error 1.04 / sqrt(2**p), 0.8% at p=14
+    top / top_count                       Misra-Gries: counts are under-
+                                          estimated by at most (n - kept)/(k + 1)
+"""
+import numpy as np
+import pandas as pd
+
+from core.profile import BLANKS, QUANTILES, STAT_COLUMNS, DataProfile, _kind
+
+DEFAULT_KLL_K = 200
+DEFAULT_HLL_PRECISION = 14
+DEFAULT_HEAVY_HITTERS = 64
+
+
+def quantile_rank_error(k):
+    """
+    Normalized rank error of a KLL sketch with parameter `k` (99% confidence,
+    single quantile), from the empirical fit published with Apache
+    DataSketches.
+    """
+    return 2.296 / k ** 0.9723
+
+
+# ---------------------------------------------------------------------------
+# Moments
+# ---------------------------------------------------------------------------
+
+class Moments:
+    """
+    Count, mean, variance, min and max of several columns at once (Welford's
+    update generalised to blocks, merged with Chan et al.'s formula). NaNs
+    are skipped. All figures are exact up to float rounding.
+    """
+
+    def __init__(self, n_cols):
+        self.count = np.zeros(n_cols)
+        self.mean = np.zeros(n_cols)
+        self.m2 = np.zeros(n_cols)
+        self.min = np.full(n_cols, np.nan)
+        self.max = np.full(n_cols, np.nan)
+
+    def update(self, values):
+        """Add a float block (rows x columns)."""
+        if not len(values):
+            return
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0).astype("float64")
+        has = count > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(count, 1)
+            centred = np.where(valid, values - mean, 0.0)
+            m2 = (centred * centred).sum(axis=0)
+        low = np.where(has, np.where(valid, values, np.inf).min(axis=0), np.nan)
+        high = np.where(has, np.where(valid, values, -np.inf).max(axis=0), np.nan)
+        self._combine(count, mean, m2, low, high)
+
+    def merge(self, other):
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def _combine(self, count, mean, m2, low, high):
+        total = self.count + count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = mean - self.mean
+            share = np.where(total > 0, count / np.maximum(total, 1), 0.0)
+            self.mean = self.mean + delta * share
+            self.m2 = self.m2 + m2 + delta * delta * self.count * share
+        self.count = total
+        self.min = np.fmin(self.min, low)
+        self.max = np.fmax(self.max, high)
+
+    @property
+    def std(self):
+        """Sample standard deviation (ddof=1, as pandas), NaN below two values."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+
+# ---------------------------------------------------------------------------
+# Quantiles
+# ---------------------------------------------------------------------------
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang & Liberty, 2016) of one numeric column.
+
+    Values enter level 0; a level that outgrows its capacity is sorted and
+    every other item (from a random offset) moves up a level with twice the
+    weight. Level capacities shrink geometrically from the top, so the
+    sketch keeps O(k) items. Until the first compaction it holds every value
+    and quantiles are exact, interpolated like `Series.quantile`.
+    """
+
+    def __init__(self, k=DEFAULT_KLL_K, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def exact(self):
+        return len(self.levels) == 1
+
+    @property
+    def rank_error(self):
+        return 0.0 if self.exact else quantile_rank_error(self.k)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        while sum(len(items) for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            h = next(h for h in range(len(self.levels)) if len(self.levels[h]) > self._capacity(h))
+            items = np.sort(self.levels[h])
+            # An odd item out stays behind, so each promoted item stands for exactly two.
+            keep = items[len(items) - len(items) % 2:]
+            pairs = items[: len(items) - len(items) % 2]
+            promoted = pairs[int(self._rng.integers(2))::2]
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[h] = keep
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+
+    def quantiles(self, qs):
+        """Estimated values at the fractions `qs` (NaN for an empty sketch)."""
+        qs = np.asarray(qs, dtype="float64")
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        if self.exact:
+            return np.quantile(self.levels[0], qs)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        pos = np.searchsorted(cumulative, qs * cumulative[-1], side="left")
+        return items[np.minimum(pos, len(items) - 1)]
+
+
+# ---------------------------------------------------------------------------
+# Distinct values
+# ---------------------------------------------------------------------------
+
+def hash_values(values):
+    """64-bit hashes of a 1-D array; numbers are hashed as float64 so 1 and 1.0 agree."""
+    values = np.asarray(values)
+    if values.dtype.kind in "biuf":
+        values = values.astype("float64")
+    elif values.dtype.kind != "O":
+        values = values.astype(object)
+    return pd.util.hash_array(values)
+
+
+def _leading_zeros(x):
+    """
+    Count of leading zero bits of each (non-zero) uint64, from the float64
+    exponent. Rounding to 53 bits only matters when the next 52 bits after
+    the leading one are all ones, which a hash practically never has.
+    """
+    return (64 - np.frexp(x.astype("float64"))[1]).astype(np.uint8)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-value counter (Flajolet et al., 2007) with 2**p
+    one-byte registers and linear counting for small cardinalities.
+    """
+
+    def __init__(self, p=DEFAULT_HLL_PRECISION):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    @property
+    def relative_error(self):
+        """Relative standard error of the estimate."""
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def update(self, values):
+        if len(values):
+            self.update_hashes(hash_values(values))
+
+    def update_hashes(self, hashes):
+        p = np.uint64(self.p)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        # A guard bit caps the rank at 64 - p + 1 when the remaining bits are all zero.
+        rest = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        np.maximum.at(self.registers, index, _leading_zeros(rest) + 1)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int((self.registers == 0).sum())
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+# ---------------------------------------------------------------------------
+# Frequent values
+# ---------------------------------------------------------------------------
+
+class MisraGries:
+    """
+    Misra-Gries heavy-hitter summary with `k` counters, in its mergeable form
+    (Agarwal et al., 2012): chunk counts are added to the counters and, past
+    `k` entries, the (k+1)-th largest count is subtracted from all of them.
+    Every kept count is at most `error` below the true frequency, and any
+    value occurring more than n / (k + 1) times is guaranteed to be kept.
+    """
+
+    def __init__(self, k=DEFAULT_HEAVY_HITTERS):
+        self.k = k
+        self.n = 0
+        self.counters = pd.Series(dtype="int64")
+
+    @property
+    def error(self):
+        return (self.n - int(self.counters.sum())) / (self.k + 1)
+
+    def update(self, values):
+        if len(values):
+            self.n += len(values)
+            self._add(pd.Series(values).value_counts(sort=False))
+
+    def merge(self, other):
+        self.n += other.n
+        self._add(other.counters)
+        return self
+
+    def _add(self, counts):
+        counters = self.counters.add(counts, fill_value=0) if len(self.counters) else counts
+        if len(counters) > self.k:
+            counters = counters - np.partition(counters.to_numpy(), -(self.k + 1))[-(self.k + 1)]
+            counters = counters[counters > 0]
+        self.counters = counters.astype("int64")
+
+    def top(self):
+        """(value, estimated count) of the most frequent value, or (None, 0)."""
+        if not len(self.counters):
+            return None, 0
+        return self.counters.idxmax(), int(self.counters.max())
+
+
+# ---------------------------------------------------------------------------
+# Whole-frame profiling
+# ---------------------------------------------------------------------------
+
+class SketchProfiler:
+    """
+    Streaming counterpart of `profile_frame`: feed it DataFrame chunks (or
+    merge profilers of disjoint chunks) and `profile()` returns a
+    DataProfile of every row seen, with `error_bounds` set.
+
+    A column's kind is fixed by the first chunk it appears in; numeric
+    columns that arrive as text in a later chunk are parsed, and values
+    that don't parse count as missing.
+    """
+
+    def __init__(self, k=DEFAULT_KLL_K, hll_precision=DEFAULT_HLL_PRECISION, heavy_hitters=DEFAULT_HEAVY_HITTERS,
+                 seed=0):
+        self.k = k
+        self.hll_precision = hll_precision
+        self.heavy_hitters = heavy_hitters
+        self.seed = seed
+        self.n_rows = 0
+        self.memory_bytes = 0
+        self.columns = []
+        self.dtypes = {}
+        self.kinds = {}
+        self.null_count = {}
+        self.blank_count = {}
+        self.distinct = {}
+        self.quantiles = {}
+        self.frequent = {}
+        self.moments = None
+
+    def _add_column(self, name, dtype, kind):
+        self.columns.append(name)
+        self.dtypes[name] = str(dtype)
+        self.kinds[name] = kind
+        # Rows seen before the column first appeared don't have it.
+        self.null_count[name] = self.n_rows
+        self.blank_count[name] = 0
+        self.distinct[name] = HyperLogLog(self.hll_precision)
+        if kind == "numeric":
+            self.quantiles[name] = KLLSketch(self.k, seed=self.seed + len(self.columns))
+        else:
+            self.frequent[name] = MisraGries(self.heavy_hitters)
+
+    def _numeric_columns(self):
+        return [c for c in self.columns if self.kinds[c] == "numeric"]
+
+    def _grow_moments(self):
+        n_numeric = len(self._numeric_columns())
+        if self.moments is None:
+            self.moments = Moments(n_numeric)
+        elif len(self.moments.count) < n_numeric:
+            extra = Moments(n_numeric - len(self.moments.count))
+            for name in ("count", "mean", "m2", "min", "max"):
+                setattr(self.moments, name, np.concatenate([getattr(self.moments, name), getattr(extra, name)]))
+
+    def update(self, chunk):
+        for name, dtype in chunk.dtypes.items():
+            if name not in self.kinds:
+                self._add_column(name, dtype, _kind(dtype))
+        self._grow_moments()
+        n = len(chunk)
+        self.n_rows += n
+        self.memory_bytes += int(chunk.memory_usage(deep=False).sum())
+
+        numeric = self._numeric_columns()
+        block = np.full((n, len(numeric)), np.nan)
+        for j, name in enumerate(numeric):
+            if name not in chunk.columns:
+                self.null_count[name] += n
+                continue
+            s = chunk[name]
+            if not pd.api.types.is_numeric_dtype(s.dtype) or pd.api.types.is_bool_dtype(s.dtype):
+                s = pd.to_numeric(s, errors="coerce")
+            values = s.to_numpy(dtype="float64", na_value=np.nan)
+            block[:, j] = values
+            missing = np.isnan(values)
+            self.null_count[name] += int(missing.sum())
+            present = values[~missing]
+            self.quantiles[name].update(present)
+            self.distinct[name].update(present)
+        if len(numeric):
+            self.moments.update(block)
+
+        for name in self.columns:
+            if self.kinds[name] == "numeric":
+                continue
+            if name not in chunk.columns:
+                self.null_count[name] += n
+                continue
+            s = chunk[name]
+            nulls = s.isna().to_numpy()
+            self.null_count[name] += int(nulls.sum())
+            values = s.to_numpy(dtype=object)[~nulls]
+            if self.kinds[name] == "text":
+                blank = np.isin(values, BLANKS)
+                self.blank_count[name] += int(blank.sum())
+                values = values[~blank]
+            self.distinct[name].update(values)
+            self.frequent[name].update(values)
+        return self
+
+    def merge(self, other):
+        """Fold in a profiler of other rows (other chunks or files)."""
+        for name in other.columns:
+            if name not in self.kinds:
+                self._add_column(name, other.dtypes[name], other.kinds[name])
+        self._grow_moments()
+
+        for name in self.columns:
+            same_kind = name in other.kinds and (
+                (self.kinds[name] == "numeric") == (other.kinds[name] == "numeric")
+            )
+            if not same_kind:
+                # Absent there, or numeric on one side only: those rows count as missing.
+                self.null_count[name] += other.n_rows
+                continue
+            self.null_count[name] += other.null_count[name]
+            self.blank_count[name] += other.blank_count[name]
+            self.distinct[name].merge(other.distinct[name])
+            if name in self.quantiles:
+                self.quantiles[name].merge(other.quantiles[name])
+            else:
+                self.frequent[name].merge(other.frequent[name])
+
+        if other.moments is not None:
+            other_numeric = {name: i for i, name in enumerate(other._numeric_columns())}
+            aligned = Moments(len(self.moments.count))
+            for j, name in enumerate(self._numeric_columns()):
+                i = other_numeric.get(name)
+                if i is not None:
+                    for field in ("count", "mean", "m2", "min", "max"):
+                        getattr(aligned, field)[j] = getattr(other.moments, field)[i]
+            self.moments.merge(aligned)
+        self.n_rows += other.n_rows
+        self.memory_bytes += other.memory_bytes
+        return self
+
+    def profile(self):
+        """DataProfile of every row seen so far, with the sketches' error bounds."""
+        table = pd.DataFrame(
+            {"dtype": [self.dtypes[c] for c in self.columns], "kind": [self.kinds[c] for c in self.columns]},
+            index=pd.Index(self.columns),
+        )
+        for name in STAT_COLUMNS[1:]:
+            table[name] = np.nan
+        table["null_count"] = [self.null_count[c] for c in self.columns]
+        table["blank_count"] = [self.blank_count[c] for c in self.columns]
+        table["nunique"] = [self.distinct[c].count() for c in self.columns]
+        tops = [self.frequent[c].top() if c in self.frequent else (None, 0) for c in self.columns]
+        table["top"] = pd.Series([t for t, _ in tops], index=table.index, dtype=object)
+        table["top_count"] = [count for _, count in tops]
+
+        numeric = self._numeric_columns()
+        rank_error = 0.0
+        if numeric:
+            m = self.moments
+            stats = {"mean": np.where(m.count > 0, m.mean, np.nan), "std": m.std, "min": m.min, "max": m.max}
+            quartiles = np.array([self.quantiles[c].quantiles(QUANTILES) for c in numeric])
+            for i, q in enumerate(QUANTILES):
+                stats[f"{q:.0%}"] = quartiles[:, i]
+            for name, column in stats.items():
+                table.loc[numeric, name] = column
+            rank_error = max(self.quantiles[c].rank_error for c in numeric)
+
+        table["missing"] = (table["null_count"] + table["blank_count"]).astype(np.int64)
+        table["count"] = self.n_rows - table["missing"]
+        table["missing_share"] = table["missing"] / self.n_rows if self.n_rows else 0.0
+        error_bounds = {
+            "quantile_rank_error": rank_error,
+            "nunique_relative_error": float(1.04 / np.sqrt(2 ** self.hll_precision)),
+            "top_count_error": pd.Series(
+                [self.frequent[c].error if c in self.frequent else 0.0 for c in self.columns], index=table.index
+            ),
+        }
+        return DataProfile(table, self.n_rows, self.memory_bytes, error_bounds=error_bounds)
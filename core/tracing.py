@@ -0,0 +1,213 @@
+import contextvars
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Where JSON trace events go (one object per line); unset keeps them in memory only.
+TRACE_FILE = os.getenv("INSIGHTSPHERE_TRACE_FILE")
+# Directory for one cProfile dump per stage; unset disables profiling.
+PROFILE_DIR = os.getenv("INSIGHTSPHERE_PROFILE_DIR")
+# tracemalloc roughly doubles allocation cost, so it is opt-in.
+TRACE_MEMORY = os.getenv("INSIGHTSPHERE_TRACE_MEMORY", "").lower() in ("1", "true", "on")
+
+# The stage running in the current thread (or in threads it hands work to
+# with contextvars.copy_context), so LLM calls are counted for the right agent.
+_current_stage = contextvars.ContextVar("insightsphere_stage", default=None)
+
+MB = 1024 * 1024
+
+
+def _peak_rss_mb():
+    """Process high-water RSS in MB (None where `resource` is unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux.
+    return round(peak / MB if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _input_shape(agent, context):
+    for key in tuple(getattr(agent, "reads", None) or ()) + tuple(getattr(agent, "optional_reads", ()) or ()):
+        shape = getattr(context.get(key), "shape", None)
+        if shape is not None:
+            return [int(n) for n in shape]
+    return None
+
+
+def record_llm_call(result):
+    """Count an LLMResult against the stage that made the call, if any."""
+    stage = _current_stage.get()
+    if stage is not None:
+        stage.count_llm(result)
+
+
+def record_log(agent_name, msg):
+    """Mirror an agent log line into the trace of the stage that wrote it."""
+    stage = _current_stage.get()
+    if stage is not None:
+        stage.run.emit({"event": "log", "agent": agent_name, "message": msg})
+
+
+class StageTrace:
+    """Counters for one agent's run; LLM calls may arrive from worker threads."""
+
+    def __init__(self, run, agent):
+        self.run = run
+        self.agent = agent
+        self._lock = threading.Lock()
+        self.llm = {"calls": 0, "attempts": 0, "cache_hits": 0, "failures": 0}
+
+    def count_llm(self, result):
+        with self._lock:
+            self.llm["calls"] += 1
+            self.llm["attempts"] += result.attempts
+            self.llm["cache_hits"] += int(result.cached)
+            self.llm["failures"] += int(not result.ok)
+
+
+class RunTrace:
+    """
+    Trace of one pipeline run: a JSON event per stage plus a run summary.
+
+    Memory figures are process-wide: when stages overlap, each one's
+    tracemalloc delta/peak (measured from the stage's starting level) and
+    RSS high-water also include its neighbours' allocations. CPU time is
+    the agent's own thread, not the worker pools it hands work to.
+    """
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.stages = []
+        self._lock = threading.Lock()
+        self._own_tracemalloc = False
+        if tracer.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracemalloc = True
+        self.emit({"event": "run_start", "pid": os.getpid()})
+
+    def emit(self, event):
+        self.tracer.emit({"run_id": self.run_id, "ts": round(time.time(), 3), **event})
+
+    @contextmanager
+    def stage(self, agent, context):
+        stage = StageTrace(self, agent)
+        token = _current_stage.set(stage)
+        record = {
+            "event": "stage",
+            "agent": agent.name,
+            "input_shape": _input_shape(agent, context),
+            "status": "ok",
+        }
+        tracing = tracemalloc.is_tracing()
+        traced_before = None
+        if tracing:
+            traced_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        rss_before = _peak_rss_mb()
+        profiler = cProfile.Profile() if self.tracer.profile_dir else None
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield stage
+        except BaseException as e:
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record["wall_seconds"] = round(time.perf_counter() - wall0, 4)
+            record["cpu_seconds"] = round(time.thread_time() - cpu0, 4)
+            rss_after = _peak_rss_mb()
+            record["peak_rss_mb"] = rss_after
+            if rss_before is not None:
+                record["peak_rss_growth_mb"] = round(rss_after - rss_before, 1)
+            if tracing and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                record["traced_delta_mb"] = round((current - traced_before) / MB, 2)
+                record["traced_peak_mb"] = round((peak - traced_before) / MB, 2)
+            record["llm"] = dict(stage.llm)
+            if profiler is not None:
+                record["profile"] = self._dump_profile(profiler, agent.name)
+            _current_stage.reset(token)
+            with self._lock:
+                self.stages.append(record)
+            self.emit(record)
+
+    def _dump_profile(self, profiler, name):
+        os.makedirs(self.tracer.profile_dir, exist_ok=True)
+        path = os.path.join(self.tracer.profile_dir, f"{self.run_id}_{len(self.stages):02d}_{name}.prof")
+        profiler.dump_stats(path)
+        return path
+
+    def summary(self):
+        """Run summary so far: totals plus the per-stage records, in completion order."""
+        with self._lock:
+            stages = [dict(s) for s in self.stages]
+        llm = {"calls": 0, "attempts": 0, "cache_hits": 0, "failures": 0}
+        for s in stages:
+            for k in llm:
+                llm[k] += s["llm"][k]
+        return {
+            "run_id": self.run_id,
+            "started": self.started,
+            "wall_seconds": round(time.perf_counter() - self._t0, 3),
+            "peak_rss_mb": _peak_rss_mb(),
+            "llm": llm,
+            "stages": stages,
+        }
+
+    def finish(self, **extra):
+        summary = self.summary()
+        summary.update(extra)
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+        self.emit({"event": "run_end", **{k: v for k, v in summary.items() if k != "stages"}})
+        return summary
+
+
+class Tracer:
+    """
+    Emits structured trace events for pipeline runs.
+
+    sink:         a path to append JSON lines to, a file-like object, or None
+                  (events are then only kept in the run summary).
+    profile_dir:  dump a cProfile file per stage there.
+    trace_memory: measure Python allocations per stage with tracemalloc.
+    """
+
+    def __init__(self, sink=TRACE_FILE, profile_dir=PROFILE_DIR, trace_memory=TRACE_MEMORY):
+        self.sink = sink
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+
+    def start_run(self):
+        return RunTrace(self)
+
+    def emit(self, event):
+        if self.sink is None:
+            return
+        line = json.dumps(event, default=str)
+        with self._lock:
+            if isinstance(self.sink, str):
+                with open(self.sink, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            else:
+                self.sink.write(line + "\n")
+                self.sink.flush()
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import pickle
+
+from core.ingest import IngestResult
+from core.llm_cache import DEFAULT_CACHE_DIR
+
+HASH_BLOCK = 8 * 1024 * 1024
+
+
+def content_hash(data, *salt):
+    """blake2b digest of the upload bytes plus anything that changes how they parse."""
+    h = hashlib.blake2b(digest_size=20)
+    view = memoryview(data)
+    for start in range(0, len(view), HASH_BLOCK):
+        h.update(view[start:start + HASH_BLOCK])
+    for part in salt:
+        h.update(b"\0" + str(part).encode("utf-8"))
+    return h.hexdigest()
+
+
+class UploadCache:
+    """
+    Parsed uploads persisted as uncompressed Feather (Arrow IPC) files.
+
+    Each entry is keyed by the content hash of the uploaded bytes, so a
+    Streamlit rerun or a re-upload of the same file is memory-mapped back
+    instead of re-parsed. The least recently used entries are deleted once
+    the directory grows past `max_bytes`.
+    """
+
+    def __init__(self, directory=None, max_bytes=2 * 1024 ** 3, enabled=True):
+        self.directory = directory or os.path.join(DEFAULT_CACHE_DIR, "uploads")
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".feather", base + ".json"
+
+    def _profile_path(self, key):
+        # Whole-file statistics of sampled uploads, next to the sample itself.
+        return os.path.join(self.directory, key + ".profile.pkl")
+
+    def database_path(self, key, data):
+        """
+        A file holding the uploaded database bytes: SQLite reads tables from
+        a path, and keeping one copy per upload lets table listing and
+        reads on every rerun share it.
+        """
+        path = os.path.join(self.directory, key + ".db")
+        if not os.path.exists(path):
+            # Evict first: the new copy must survive until it has been read.
+            self.evict()
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return path
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        data_path, meta_path = self._paths(key)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+        import pyarrow.feather as feather
+
+        try:
+            table = feather.read_table(data_path, memory_map=True)
+            with open(meta_path) as f:
+                meta = json.load(f)
+            profile = None
+            if meta.get("profile"):
+                with open(self._profile_path(key), "rb") as f:
+                    profile = pickle.load(f)
+        except (OSError, ValueError, pickle.UnpicklingError):
+            return None
+        # Touch both files so eviction sees them as recently used.
+        os.utime(data_path)
+        os.utime(meta_path)
+        return IngestResult(
+            table.to_pandas(),
+            meta["rows_seen"],
+            sampled=meta["sampled"],
+            notice=meta["notice"],
+            profile=profile,
+        )
+
+    def put(self, key, result):
+        """Store a parsed upload; frames Arrow can't represent are simply not cached."""
+        if not self.enabled or result is None:
+            return False
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        df = result.df
+        if not all(isinstance(c, str) for c in df.columns):
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        data_path, meta_path = self._paths(key)
+        tmp_path = data_path + ".tmp"
+        try:
+            # Uncompressed so the file can be memory-mapped without a decode step.
+            feather.write_feather(df.reset_index(drop=True), tmp_path, compression="uncompressed")
+        except (pa.ArrowException, TypeError, ValueError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, data_path)
+        if result.profile is not None:
+            with open(self._profile_path(key), "wb") as f:
+                pickle.dump(result.profile, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(meta_path, "w") as f:
+            json.dump(
+                {
+                    "rows_seen": result.rows_seen,
+                    "sampled": result.sampled,
+                    "notice": result.notice,
+                    "profile": result.profile is not None,
+                },
+                f,
+            )
+        self.evict()
+        return True
+
+    def evict(self):
+        if not os.path.isdir(self.directory):
+            return
+        entries = []
+        total = 0
+        for fname in os.listdir(self.directory):
+            if not fname.endswith((".feather", ".db")):
+                continue
+            path = os.path.join(self.directory, fname)
+            st = os.stat(path)
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            base = os.path.splitext(path)[0]
+            for sidecar in (base + ".json", base + ".profile.pkl"):
+                if os.path.exists(sidecar):
+                    os.remove(sidecar)
+            total -= size
@@ -0,0 +1,220 @@
+"""
+Native ReportLab vector drawings for ChartSpecs, so the PDF report embeds
+charts as a few kilobytes of paths and text instead of 200-dpi PNGs. Kinds
+without a vector drawer return None and the report falls back to the
+rendered raster bytes.
+"""
+import numpy as np
+import pandas as pd
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.shapes import Drawing, Group, Rect, String
+from reportlab.lib import colors
+
+# Endpoints of matplotlib's "Blues" colormap, interpolated linearly.
+HEAT_LOW = (0xF7 / 255, 0xFB / 255, 0xFF / 255)
+HEAT_HIGH = (0x08 / 255, 0x30 / 255, 0x6B / 255)
+BAR_COLOR = colors.HexColor("#1f77b4")
+LINE_COLORS = [colors.HexColor(c) for c in (
+    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+    "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf",
+)]
+# Points kept per ROC curve; curves from large test sets have thousands.
+MAX_CURVE_POINTS = 300
+FONT = "Helvetica"
+
+
+def _rotated(string, x, y, angle):
+    """`string` drawn at (x, y), turned `angle` degrees anticlockwise."""
+    group = Group(string)
+    group.translate(x, y)
+    group.rotate(angle)
+    return group
+
+
+def _title(drawing, spec, width, height):
+    if spec.title:
+        drawing.add(String(width / 2, height - 14, spec.title, fontName=FONT, fontSize=11, textAnchor="middle"))
+
+
+def _axis_labels(drawing, data, width, x0, y0, plot_h):
+    if data.get("xlabel"):
+        drawing.add(String(x0 + (width - x0) / 2, 4, data["xlabel"], fontName=FONT, fontSize=8, textAnchor="middle"))
+    if data.get("ylabel"):
+        label = String(0, 0, data["ylabel"], fontName=FONT, fontSize=8, textAnchor="middle")
+        drawing.add(_rotated(label, 10, y0 + plot_h / 2, 90))
+
+
+def _bars(spec, width, height, labels, values):
+    data = spec.data
+    drawing = Drawing(width, height)
+    x0, y0 = 45, 55 if data.get("xtick_rotation") else 35
+    chart = VerticalBarChart()
+    chart.x, chart.y = x0, y0
+    chart.width, chart.height = width - x0 - 10, height - y0 - 25
+    chart.data = [list(values)]
+    chart.bars[0].fillColor = BAR_COLOR
+    chart.bars[0].strokeColor = None
+    chart.categoryAxis.categoryNames = [str(label) for label in labels]
+    chart.categoryAxis.labels.fontName = FONT
+    chart.categoryAxis.labels.fontSize = 7
+    if data.get("xtick_rotation"):
+        chart.categoryAxis.labels.angle = data["xtick_rotation"]
+        chart.categoryAxis.labels.boxAnchor = "ne"
+    chart.valueAxis.labels.fontName = FONT
+    chart.valueAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = data["ylim"][0] if "ylim" in data else 0
+    if "ylim" in data:
+        chart.valueAxis.valueMax = data["ylim"][1]
+    drawing.add(chart)
+    _title(drawing, spec, width, height)
+    _axis_labels(drawing, data, width, x0, y0, chart.height)
+    return drawing
+
+
+def _draw_bar(spec, width, height):
+    return _bars(spec, width, height, spec.data["labels"], [float(v) for v in spec.data["values"]])
+
+
+def _draw_count(spec, width, height):
+    counts = pd.Series(spec.data["values"]).value_counts(sort=False).sort_index()
+    return _bars(spec, width, height, list(counts.index), [int(v) for v in counts.values])
+
+
+def _thin(x, y):
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    if len(x) > MAX_CURVE_POINTS:
+        keep = np.unique(np.linspace(0, len(x) - 1, MAX_CURVE_POINTS).astype(int))
+        x, y = x[keep], y[keep]
+    return list(zip(x.tolist(), y.tolist()))
+
+
+def _draw_roc(spec, width, height):
+    data = spec.data
+    curves = data.get("curves") or [{"label": None, "fpr": data["fpr"], "tpr": data["tpr"], "auc": data["auc"]}]
+    drawing = Drawing(width, height)
+    x0, y0 = 45, 35
+    plot = LinePlot()
+    plot.x, plot.y = x0, y0
+    plot.width, plot.height = width - x0 - 15, height - y0 - 25
+    plot.data = [_thin(c["fpr"], c["tpr"]) for c in curves] + [[(0.0, 0.0), (1.0, 1.0)]]
+    for i in range(len(curves)):
+        plot.lines[i].strokeColor = LINE_COLORS[i % len(LINE_COLORS)]
+        plot.lines[i].strokeWidth = 1.2
+    plot.lines[len(curves)].strokeColor = colors.grey
+    plot.lines[len(curves)].strokeDashArray = (3, 3)
+    for axis in (plot.xValueAxis, plot.yValueAxis):
+        axis.valueMin, axis.valueMax, axis.valueStep = 0, 1, 0.2
+        axis.labels.fontName = FONT
+        axis.labels.fontSize = 7
+    drawing.add(plot)
+
+    legend = Legend()
+    legend.x, legend.y = plot.x + plot.width - 5, plot.y + 8
+    legend.boxAnchor = "se"
+    legend.fontName = FONT
+    legend.fontSize = 6 if len(curves) > 1 else 7
+    legend.dx = legend.dy = 6
+    legend.deltay = 8
+    legend.columnMaximum = len(curves)
+    legend.alignment = "right"
+    legend.colorNamePairs = [
+        (LINE_COLORS[i % len(LINE_COLORS)],
+         f"{c['label']}: AUC = {c['auc']:.2f}" if c.get("label") is not None else f"AUC = {c['auc']:.2f}")
+        for i, c in enumerate(curves)
+    ]
+    drawing.add(legend)
+    _title(drawing, spec, width, height)
+    _axis_labels(drawing, data, width, x0, y0, plot.height)
+    return drawing
+
+
+def _heat_color(t):
+    r, g, b = (lo + (hi - lo) * t for lo, hi in zip(HEAT_LOW, HEAT_HIGH))
+    return colors.Color(r, g, b)
+
+
+def _draw_heatmap(spec, width, height):
+    data = spec.data
+    matrix = data["matrix"]
+    if isinstance(matrix, pd.DataFrame):
+        rows, cols = [str(i) for i in matrix.index], [str(c) for c in matrix.columns]
+        values = matrix.to_numpy(dtype=float)
+    else:
+        values = np.asarray(matrix, dtype=float)
+        rows, cols = [str(i) for i in range(values.shape[0])], [str(j) for j in range(values.shape[1])]
+    finite = values[np.isfinite(values)]
+    lo, hi = (finite.min(), finite.max()) if finite.size else (0.0, 1.0)
+    span = (hi - lo) or 1.0
+
+    font_size = data.get("tick_fontsize", 7)
+    label_w = min(max(len(r) for r in rows) * font_size * 0.55 + 6, width * 0.3) if rows else 0
+    rotated = bool(data.get("xtick_rotation"))
+    label_h = min(max(len(c) for c in cols) * font_size * 0.45 + 8, height * 0.3) if rotated else 14
+    x0, y0 = label_w + (14 if data.get("ylabel") else 0), label_h + (12 if data.get("xlabel") else 0)
+    bar_w = 30
+    grid_w, grid_h = width - x0 - bar_w - 10, height - y0 - 22
+    cw, ch = grid_w / len(cols), grid_h / len(rows)
+
+    drawing = Drawing(width, height)
+    annotate = data.get("annot", False)
+    fmt = data.get("fmt", ".2g")
+    line_w = data.get("linewidths", 0)
+    for i, row in enumerate(rows):
+        y = y0 + grid_h - (i + 1) * ch
+        for j in range(len(cols)):
+            v = values[i, j]
+            t = (v - lo) / span if np.isfinite(v) else 0.0
+            drawing.add(Rect(
+                x0 + j * cw, y, cw, ch,
+                fillColor=_heat_color(t) if np.isfinite(v) else colors.white,
+                strokeColor=colors.white if line_w else None, strokeWidth=line_w,
+            ))
+            if annotate and np.isfinite(v):
+                text = format(int(round(v)), fmt) if fmt == "d" else format(v, fmt)
+                drawing.add(String(
+                    x0 + (j + 0.5) * cw, y + ch / 2 - 3, text, fontName=FONT, fontSize=8,
+                    textAnchor="middle", fillColor=colors.white if t > 0.5 else colors.black,
+                ))
+        drawing.add(String(x0 - 3, y + ch / 2 - 2.5, row, fontName=FONT, fontSize=font_size, textAnchor="end"))
+    for j, col in enumerate(cols):
+        label = String(0, 0, col, fontName=FONT, fontSize=font_size, textAnchor="end" if rotated else "middle")
+        if rotated:
+            drawing.add(_rotated(label, x0 + (j + 0.5) * cw, y0 - 4, data["xtick_rotation"]))
+        else:
+            label.x, label.y = x0 + (j + 0.5) * cw, y0 - 10
+            drawing.add(label)
+
+    # Colour bar with its range.
+    steps = 20
+    bx = x0 + grid_w + 8
+    for k in range(steps):
+        drawing.add(Rect(bx, y0 + k * grid_h / steps, 8, grid_h / steps + 0.5,
+                         fillColor=_heat_color(k / (steps - 1)), strokeColor=None))
+    for value, y in ((lo, y0), (hi, y0 + grid_h - 6)):
+        drawing.add(String(bx + 11, y, format(value, ".3g"), fontName=FONT, fontSize=6))
+
+    _title(drawing, spec, width, height)
+    _axis_labels(drawing, data, width, x0, y0, grid_h)
+    return drawing
+
+
+VECTOR_DRAWERS = {
+    "heatmap": _draw_heatmap,
+    "count": _draw_count,
+    "bar": _draw_bar,
+    "roc": _draw_roc,
+}
+
+
+def chart_drawing(spec, width):
+    """
+    A ReportLab Drawing of `spec`, `width` points wide with the height
+    following the spec's figsize, or None when its kind has no vector form.
+    """
+    drawer = VECTOR_DRAWERS.get(spec.kind)
+    if drawer is None:
+        return None
+    fig_w, fig_h = spec.figsize
+    return drawer(spec, width, width * fig_h / fig_w)